@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from database import SessionLocal, AIGenerationCacheDB
+
+# Generated questions keyed by normalized prompt and model parameters.
+# A small in-memory LRU sits in front of the ai_generation_cache table.
+AI_CACHE_TTL_SECONDS = int(os.environ.get("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+AI_CACHE_MEMORY_ENTRIES = int(os.environ.get("AI_CACHE_MEMORY_ENTRIES", "256"))
+AI_CACHE_MAX_ROWS = int(os.environ.get("AI_CACHE_MAX_ROWS", "5000"))
+
+_entries: OrderedDict[str, dict] = OrderedDict()
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "saved_ms": 0.0}
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+
+def make_key(prompt: str, model: str, temperature: float, max_tokens: int) -> str:
+    """Build a cache key from the normalized prompt and the parameters that shape the output."""
+    raw = json.dumps([normalize_prompt(prompt), model, temperature, max_tokens])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _remember(key: str, questions: list[dict], generation_ms: float, stored_at: float):
+    with _lock:
+        _entries[key] = {"questions": questions, "generation_ms": generation_ms, "stored_at": stored_at}
+        _entries.move_to_end(key)
+        while len(_entries) > AI_CACHE_MEMORY_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def get(key: str) -> Optional[list[dict]]:
+    """Get cached questions (as dicts) for a key, checking memory first, then the database."""
+    now = time.time()
+    with _lock:
+        entry = _entries.get(key)
+        if entry and now - entry["stored_at"] > AI_CACHE_TTL_SECONDS:
+            del _entries[key]
+            entry = None
+        if entry:
+            _entries.move_to_end(key)
+            _stats["memory_hits"] += 1
+            _stats["saved_ms"] += entry["generation_ms"]
+            return entry["questions"]
+
+    db = SessionLocal()
+    try:
+        row = db.query(AIGenerationCacheDB).filter(AIGenerationCacheDB.key == key).first()
+        if row and datetime.utcnow() - row.created_at > timedelta(seconds=AI_CACHE_TTL_SECONDS):
+            db.delete(row)
+            db.commit()
+            row = None
+        if not row:
+            with _lock:
+                _stats["misses"] += 1
+            return None
+        row.hits = (row.hits or 0) + 1
+        row.last_used_at = datetime.utcnow()
+        db.commit()
+        questions = row.questions or []
+        stored_at = row.created_at.replace(tzinfo=timezone.utc).timestamp()
+        _remember(key, questions, row.generation_ms or 0.0, stored_at)
+        with _lock:
+            _stats["disk_hits"] += 1
+            _stats["saved_ms"] += row.generation_ms or 0.0
+        return questions
+    except Exception as e:
+        # The cache must never break generation
+        print(f"WARNING: AI cache lookup failed: {e}")
+        with _lock:
+            _stats["misses"] += 1
+        return None
+    finally:
+        db.close()
+
+
+def put(key: str, prompt: str, model: str, questions: list[dict], generation_ms: float):
+    """Store generated questions in both tiers, evicting the least recently used rows past AI_CACHE_MAX_ROWS."""
+    _remember(key, questions, generation_ms, time.time())
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.merge(AIGenerationCacheDB(
+            key=key, prompt=prompt, model=model, questions=questions,
+            generation_ms=generation_ms, hits=0, created_at=now, last_used_at=now
+        ))
+        db.commit()
+
+        expired = db.query(AIGenerationCacheDB).filter(
+            AIGenerationCacheDB.created_at < now - timedelta(seconds=AI_CACHE_TTL_SECONDS)
+        ).delete(synchronize_session=False)
+        overflow = [
+            k for (k,) in db.query(AIGenerationCacheDB.key)
+            .order_by(AIGenerationCacheDB.last_used_at.desc())
+            .offset(AI_CACHE_MAX_ROWS)
+            .all()
+        ]
+        if overflow:
+            db.query(AIGenerationCacheDB).filter(
+                AIGenerationCacheDB.key.in_(overflow)
+            ).delete(synchronize_session=False)
+        db.commit()
+        with _lock:
+            _stats["stores"] += 1
+            _stats["evictions"] += expired + len(overflow)
+    except Exception as e:
+        db.rollback()
+        print(f"WARNING: AI cache store failed: {e}")
+    finally:
+        db.close()
+
+
+def clear():
+    """Drop every cached generation from both tiers."""
+    with _lock:
+        _entries.clear()
+    db = SessionLocal()
+    try:
+        db.query(AIGenerationCacheDB).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def cache_stats() -> dict:
+    """Get hit counters per tier and the model time saved by cache hits."""
+    with _lock:
+        hits = _stats["memory_hits"] + _stats["disk_hits"]
+        lookups = hits + _stats["misses"]
+        return {
+            "memory_entries": len(_entries),
+            "memory_hits": _stats["memory_hits"],
+            "disk_hits": _stats["disk_hits"],
+            "misses": _stats["misses"],
+            "stores": _stats["stores"],
+            "evictions": _stats["evictions"],
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "latency_saved_ms": round(_stats["saved_ms"], 1),
+        }
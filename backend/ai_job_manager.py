@@ -0,0 +1,256 @@
+import asyncio
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Optional
+from ai_service import stream_questions_async
+from quiz_manager import import_questions
+
+# Background AI generation: jobs are queued and processed by a small worker pool.
+# Large requests are split into chunks so no single model call hits max_tokens,
+# and questions are added to the quiz one by one as the model streams them.
+AI_JOB_WORKERS = int(os.environ.get("AI_JOB_WORKERS", "2"))
+AI_JOB_QUEUE_MAX = int(os.environ.get("AI_JOB_QUEUE_MAX", "100"))
+AI_JOB_CHUNK_SIZE = int(os.environ.get("AI_JOB_CHUNK_SIZE", "10"))
+AI_JOBS_PER_USER = int(os.environ.get("AI_PER_USER_CONCURRENCY", "1"))
+MAX_QUESTIONS_PER_JOB = 100
+JOB_RETENTION_SECONDS = 600  # Finished jobs stay pollable this long
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_jobs: OrderedDict[str, dict] = OrderedDict()
+_queue: Optional[asyncio.Queue] = None
+_workers: list[asyncio.Task] = []
+_running: dict[str, asyncio.Task] = {}  # job_id -> task processing it
+
+
+class JobQueueFullError(Exception):
+    """Raised when the generation queue has no room for another job."""
+
+
+class TooManyJobsError(Exception):
+    """Raised when a user already has the maximum number of active jobs."""
+
+
+def requested_count(prompt: str, count: Optional[int] = None) -> Optional[int]:
+    """Number of questions asked for, from the explicit count or a '<n> ... questions' phrase in the prompt."""
+    if count is None:
+        match = re.search(r"\b(\d{1,3})\s+(?:[\w-]+\s+){0,3}questions?\b", prompt, re.IGNORECASE)
+        if not match:
+            return None
+        count = int(match.group(1))
+    return max(1, min(count, MAX_QUESTIONS_PER_JOB))
+
+
+def _chunk_sizes(count: Optional[int]) -> list[Optional[int]]:
+    if count is None:
+        return [None]  # Let the model decide, in a single call
+    sizes = [AI_JOB_CHUNK_SIZE] * (count // AI_JOB_CHUNK_SIZE)
+    if count % AI_JOB_CHUNK_SIZE:
+        sizes.append(count % AI_JOB_CHUNK_SIZE)
+    return sizes
+
+
+def _chunk_prompt(prompt: str, size: Optional[int], index: int, total: int, previous: list[str]) -> str:
+    if size is None:
+        return prompt
+    parts = [prompt, f"\nThis is batch {index + 1} of {total}. Generate exactly {size} questions in this batch."]
+    if previous:
+        # Keep the batches from repeating each other
+        parts.append("Do not repeat any of these questions:")
+        parts.extend(f"- {text}" for text in previous)
+    return "\n".join(parts)
+
+
+def _snapshot(job: dict) -> dict:
+    return {
+        "id": job["id"],
+        "quiz_id": job["quiz_id"],
+        "status": job["status"],
+        "total_chunks": job["total_chunks"],
+        "completed_chunks": job["completed_chunks"],
+        "requested_count": job["requested_count"],
+        "count": len(job["questions"]),
+        "questions": list(job["questions"]),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+async def _notify(job: dict):
+    job["updated_at"] = time.time()
+    job["version"] += 1
+    async with job["changed"]:
+        job["changed"].notify_all()
+
+
+def _prune():
+    now = time.time()
+    for job_id in [
+        job_id for job_id, job in _jobs.items()
+        if job["status"] not in ACTIVE_STATUSES and now - job["updated_at"] > JOB_RETENTION_SECONDS
+    ]:
+        del _jobs[job_id]
+
+
+def create_job(
+    quiz_id: str, user_id: str, prompt: str, replace: bool = False,
+    count: Optional[int] = None, use_cache: bool = True
+) -> dict:
+    """Queue a generation job and return its initial status."""
+    if _queue is None:
+        raise RuntimeError("AI job workers are not running")
+    _prune()
+    active = sum(1 for job in _jobs.values() if job["user_id"] == user_id and job["status"] in ACTIVE_STATUSES)
+    if active >= AI_JOBS_PER_USER:
+        raise TooManyJobsError("A question generation is already running for this user")
+    if _queue.full():
+        raise JobQueueFullError("Too many generation jobs queued, try again shortly")
+
+    wanted = requested_count(prompt, count)
+    now = time.time()
+    job = {
+        "id": str(uuid.uuid4()),
+        "quiz_id": quiz_id,
+        "user_id": user_id,
+        "prompt": prompt,
+        "replace": replace,
+        "use_cache": use_cache,
+        "requested_count": wanted,
+        "chunks": _chunk_sizes(wanted),
+        "status": "queued",
+        "completed_chunks": 0,
+        "questions": [],
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "version": 0,
+        "changed": asyncio.Condition(),
+    }
+    job["total_chunks"] = len(job["chunks"])
+    _jobs[job["id"]] = job
+    _queue.put_nowait(job["id"])
+    return _snapshot(job)
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Get a job's status and the questions added so far."""
+    job = _jobs.get(job_id)
+    return _snapshot(job) if job else None
+
+
+def get_job_owner(job_id: str) -> Optional[str]:
+    job = _jobs.get(job_id)
+    return job["user_id"] if job else None
+
+
+async def cancel_job(job_id: str) -> bool:
+    """Stop a queued or running job. Questions from finished chunks are kept."""
+    job = _jobs.get(job_id)
+    if not job or job["status"] not in ACTIVE_STATUSES:
+        return False
+    task = _running.get(job_id)
+    if task:
+        task.cancel()
+    job["status"] = "cancelled"
+    await _notify(job)
+    return True
+
+
+async def watch_job(job_id: str):
+    """Yield (snapshot, new_questions) every time the job changes, until it finishes."""
+    job = _jobs.get(job_id)
+    if not job:
+        return
+    sent = 0
+    seen = -1
+    while True:
+        async with job["changed"]:
+            await job["changed"].wait_for(lambda: job["version"] != seen)
+        seen = job["version"]
+        snapshot = _snapshot(job)
+        new_questions = snapshot["questions"][sent:]
+        sent = len(snapshot["questions"])
+        yield snapshot, new_questions
+        if snapshot["status"] not in ACTIVE_STATUSES:
+            return
+
+
+async def _run_job(job: dict):
+    loop = asyncio.get_event_loop()
+    previous: list[str] = []
+    for index, size in enumerate(job["chunks"]):
+        prompt = _chunk_prompt(job["prompt"], size, index, job["total_chunks"], previous)
+        added = 0
+        stream = stream_questions_async(prompt, job["user_id"], use_cache=job["use_cache"])
+        async with aclosing(stream):
+            # Add each question the moment the model finishes writing it
+            async for question in stream:
+                if size is not None and added >= size:
+                    continue
+                replace = job["replace"] and not job["questions"]
+                imported = await loop.run_in_executor(None, import_questions, job["quiz_id"], [question], replace)
+                if not imported:
+                    raise ValueError("Quiz no longer exists")
+                added += 1
+                previous.append(question.text)
+                job["questions"].extend(q.model_dump() for q in imported)
+                await _notify(job)
+        job["completed_chunks"] = index + 1
+        await _notify(job)
+
+
+async def _worker():
+    while True:
+        job_id = await _queue.get()
+        job = _jobs.get(job_id)
+        try:
+            if not job or job["status"] != "queued":
+                continue
+            job["status"] = "running"
+            await _notify(job)
+            task = asyncio.create_task(_run_job(job))
+            _running[job_id] = task
+            try:
+                await task
+                job["status"] = "completed"
+            except asyncio.CancelledError:
+                if job["status"] != "cancelled":
+                    raise  # The worker itself is shutting down
+            except asyncio.TimeoutError:
+                job["status"] = "failed"
+                job["error"] = "AI generation timed out"
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+            finally:
+                _running.pop(job_id, None)
+            await _notify(job)
+        finally:
+            _queue.task_done()
+
+
+def start_workers(count: int = AI_JOB_WORKERS):
+    """Start the worker pool on the running event loop."""
+    global _queue
+    _queue = asyncio.Queue(maxsize=AI_JOB_QUEUE_MAX)
+    for _ in range(count):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_workers():
+    """Cancel the worker pool and any jobs still in flight."""
+    global _queue
+    for task in list(_running.values()) + _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+    for job in _jobs.values():
+        if job["status"] in ACTIVE_STATUSES:
+            job["status"] = "cancelled"
+            await _notify(job)
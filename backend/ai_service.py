@@ -1,13 +1,36 @@
 import os
 import json
-import re
+import asyncio
+import time
+from contextlib import aclosing
+from typing import Optional
 from dotenv import load_dotenv
-from groq import Groq
+from pydantic import ValidationError
+from groq import AsyncGroq
 from models import QuestionCreate, QuestionType
+import ai_cache
 
 # Load environment variables from .env file
 load_dotenv()
 
+MODEL = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.7
+MAX_TOKENS = 4096
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL")  # Override to point at a local stand-in
+
+# Limits for the async generation path
+AI_GLOBAL_CONCURRENCY = int(os.environ.get("AI_GLOBAL_CONCURRENCY", "4"))
+AI_PER_USER_CONCURRENCY = int(os.environ.get("AI_PER_USER_CONCURRENCY", "1"))
+AI_TIMEOUT_SECONDS = float(os.environ.get("AI_TIMEOUT_SECONDS", "60"))
+
+_async_client: Optional[AsyncGroq] = None
+_global_slots = asyncio.Semaphore(AI_GLOBAL_CONCURRENCY)
+_user_generations: dict[str, int] = {}  # user_id -> generations in progress
+
+
+class GenerationBusyError(Exception):
+    """Raised when a user already has the maximum number of generations running."""
+
 
 SYSTEM_PROMPT = """You are a quiz question generator. Generate quiz questions based on the user's request.
 
@@ -40,69 +63,191 @@ Rules:
 IMPORTANT: Respond ONLY with the JSON object, no additional text or explanation."""
 
 
-def generate_questions(prompt: str) -> list[QuestionCreate]:
-    """Generate quiz questions using Groq API."""
+def _get_api_key() -> str:
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key:
         raise ValueError("GROQ_API_KEY environment variable is not set")
+    return api_key
+
+
+def _build_messages(prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def get_async_client() -> AsyncGroq:
+    """Shared async Groq client, reused across requests for connection pooling."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncGroq(api_key=_get_api_key(), base_url=GROQ_BASE_URL, max_retries=1)
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+async def generate_questions_async(prompt: str, user_id: str, use_cache: bool = True) -> list[QuestionCreate]:
+    """Generate quiz questions without blocking the event loop. See stream_questions_async."""
+    async with aclosing(stream_questions_async(prompt, user_id, use_cache)) as stream:
+        return [question async for question in stream]
+
+
+async def stream_questions_async(prompt: str, user_id: str, use_cache: bool = True):
+    """Yield validated questions as soon as each one is complete in the model's output.
+
+    Each user may run AI_PER_USER_CONCURRENCY generations at once (GenerationBusyError
+    otherwise) and at most AI_GLOBAL_CONCURRENCY run across the instance. Waiting plus
+    generation is bounded by AI_TIMEOUT_SECONDS (asyncio.TimeoutError). Closing the
+    generator cancels the in-flight model request. Results are served from and stored in
+    the prompt cache; use_cache=False forces a fresh generation (which is still stored).
+    """
+    if _user_generations.get(user_id, 0) >= AI_PER_USER_CONCURRENCY:
+        raise GenerationBusyError("A question generation is already running for this user")
+
+    _user_generations[user_id] = _user_generations.get(user_id, 0) + 1
+    try:
+        deadline = time.monotonic() + AI_TIMEOUT_SECONDS
+        async with aclosing(_stream_cached(prompt, use_cache, deadline)) as stream:
+            while True:
+                try:
+                    question = await asyncio.wait_for(stream.__anext__(), timeout=deadline - time.monotonic())
+                except StopAsyncIteration:
+                    return
+                yield question
+    finally:
+        _user_generations[user_id] -= 1
+        if _user_generations[user_id] <= 0:
+            del _user_generations[user_id]
+
+
+async def _stream_cached(prompt: str, use_cache: bool, deadline: float):
+    loop = asyncio.get_event_loop()
+    key = ai_cache.make_key(prompt, MODEL, TEMPERATURE, MAX_TOKENS)
+    if use_cache:
+        cached = await loop.run_in_executor(None, ai_cache.get, key)
+        if cached is not None:
+            for q in cached:
+                yield QuestionCreate(**q)
+            return
 
-    client = Groq(api_key=api_key)
-
-    chat_completion = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt}
-        ],
-        model="llama-3.3-70b-versatile",
-        temperature=0.7,
-        max_tokens=4096,
-    )
-
-    response_text = chat_completion.choices[0].message.content
-
-    # Try to extract JSON from the response
-    json_match = re.search(r'\{[\s\S]*\}', response_text)
-    if not json_match:
-        raise ValueError("No valid JSON found in AI response")
-
-    json_str = json_match.group()
-    data = json.loads(json_str)
-
-    questions_data = data.get("questions", [])
-    if not questions_data:
-        raise ValueError("No questions found in AI response")
-
-    # Validate and convert to QuestionCreate objects
     questions = []
-    for q in questions_data:
-        # Ensure type is valid
-        q_type = q.get("type", "single")
-        if q_type not in ["single", "multiple"]:
-            q_type = "single"
-
-        # Ensure correct is a list
-        correct = q.get("correct", [0])
-        if not isinstance(correct, list):
-            correct = [correct]
-
-        # Validate correct indices
-        options = q.get("options", [])
-        correct = [c for c in correct if isinstance(c, int) and 0 <= c < len(options)]
-        if not correct:
-            correct = [0]
-
-        # For single type, ensure only one correct answer
-        if q_type == "single" and len(correct) > 1:
-            correct = [correct[0]]
-
-        question = QuestionCreate(
-            text=q.get("text", ""),
-            type=QuestionType(q_type),
-            options=options,
-            correct=correct,
-            time_limit=min(max(q.get("time_limit", 30), 5), 120),
-            points=min(max(q.get("points", 100), 10), 1000)
+    parser = QuestionStreamParser()
+    async with _global_slots:
+        start = time.perf_counter()
+        stream = await get_async_client().chat.completions.create(
+            messages=_build_messages(prompt),
+            model=MODEL,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            stream=True,
         )
-        questions.append(question)
+        try:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for q in parser.feed(chunk.choices[0].delta.content):
+                    try:
+                        question = _to_question(q)
+                    except (ValidationError, TypeError):
+                        continue  # Skip a mistyped question, like a malformed one
+                    questions.append(question)
+                    yield question
+        finally:
+            await stream.close()
+        generation_ms = (time.perf_counter() - start) * 1000
+
+    if not questions:
+        raise ValueError("No questions found in AI response")
+    await loop.run_in_executor(
+        None, ai_cache.put, key, prompt, MODEL,
+        [q.model_dump(mode="json") for q in questions], generation_ms
+    )
 
-    return questions
+
+class QuestionStreamParser:
+    """Incremental JSON scanner that returns each question object as soon as it closes.
+
+    A question is any JSON object that is an element of an array, so both
+    {"questions": [...]} and a bare [...] work. Text around the JSON is ignored.
+    """
+
+    def __init__(self):
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._start_depth: Optional[int] = None  # Stack depth the current question opened at
+        self._current: list[str] = []
+
+    def feed(self, text: str) -> list[dict]:
+        """Consume the next piece of output and return the questions completed by it."""
+        completed = []
+        for ch in text:
+            if self._start_depth is not None:
+                self._current.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._start_depth is None and self._stack and self._stack[-1] == "[":
+                    self._start_depth = len(self._stack)
+                    self._current = [ch]
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._start_depth is not None and len(self._stack) == self._start_depth:
+                    try:
+                        item = json.loads("".join(self._current))
+                        if isinstance(item, dict):
+                            completed.append(item)
+                    except ValueError:
+                        pass  # Skip a malformed question rather than the whole response
+                    self._start_depth = None
+                    self._current = []
+        return completed
+
+
+def _to_question(q: dict) -> QuestionCreate:
+    """Validate one question dict from the model, clamping or defaulting bad fields."""
+    # Ensure type is valid
+    q_type = q.get("type", "single")
+    if q_type not in ["single", "multiple"]:
+        q_type = "single"
+
+    # Ensure correct is a list
+    correct = q.get("correct", [0])
+    if not isinstance(correct, list):
+        correct = [correct]
+
+    # Validate correct indices
+    options = q.get("options", [])
+    correct = [c for c in correct if isinstance(c, int) and 0 <= c < len(options)]
+    if not correct:
+        correct = [0]
+
+    # For single type, ensure only one correct answer
+    if q_type == "single" and len(correct) > 1:
+        correct = [correct[0]]
+
+    return QuestionCreate(
+        text=q.get("text", ""),
+        type=QuestionType(q_type),
+        options=options,
+        correct=correct,
+        time_limit=min(max(q.get("time_limit", 30), 5), 120),
+        points=min(max(q.get("points", 100), 10), 1000)
+    )
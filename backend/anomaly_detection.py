@@ -0,0 +1,147 @@
+import math
+import warnings
+from itertools import chain
+import numpy as np
+
+# Cheat-detection signals computed once per session, at quiz end, relative to the room:
+# - correct answers that are implausibly fast for that question
+# - answer-time patterns that move together with another player's (e.g. a shared screen)
+# - switching tabs shortly before answering
+# Scores are hints for the host, not verdicts.
+MIN_ROOM_ANSWERS = 5  # Answers a question needs before its timing is judged
+MIN_LOG_SPREAD = 0.05  # Floor for a question's timing spread, so near-identical times don't explode
+FAST_ANSWER_Z = 3.0  # Robust z-score of log time below which an answer is implausibly fast
+MIN_FAST_CORRECT = 2
+MIN_FLAG_RATE = 0.1  # Share of a player's answers a per-answer signal must cover to be flagged
+
+MIN_SHARED_QUESTIONS = 10  # Questions both players answered before their timing is compared
+MIN_TIMING_CORRELATION = 0.8
+CORRELATION_ALPHA = 0.01  # Chance of flagging any pair in the room by coincidence
+CORRELATION_BLOCK = 1024  # Players per block of the correlation matrix, to bound memory
+
+TAB_SWITCH_WINDOW_SECONDS = 10.0
+MIN_SWITCHED_CORRECT = 2
+
+
+def _pack_switches(tab_switch_times: list[dict], n_questions: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten each player's {question_index: [seconds, ...]} into (rows, cols, seconds) arrays."""
+    per_player, q_keys, lengths, flat = [], [], [], []
+    for switches in tab_switch_times:
+        per_player.append(len(switches))
+        q_keys.extend(switches)
+        lengths.extend(map(len, switches.values()))
+        flat.extend(chain.from_iterable(switches.values()))
+    rows = np.repeat(np.repeat(np.arange(len(tab_switch_times)), per_player), lengths)
+    cols = np.repeat(np.array(q_keys, dtype=np.int64), lengths)
+    seconds = np.array(flat, dtype=np.float64)
+    keep = (cols >= 0) & (cols < n_questions)
+    return rows[keep], cols[keep], seconds[keep]
+
+
+def _timing_z(answered: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """Robust z-score of each answer's log time within its question; NaN where not judged."""
+    timed = answered & ~np.isnan(times)
+    log_times = np.log(np.where(timed, np.maximum(times, 0.05), np.nan))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Questions nobody answered
+        median = np.nanmedian(log_times, axis=0)
+        spread = np.nanmedian(np.abs(log_times - median), axis=0) * 1.4826
+    spread = np.maximum(np.nan_to_num(spread), MIN_LOG_SPREAD)
+    z = (log_times - median) / spread
+    z[:, timed.sum(axis=0) < MIN_ROOM_ANSWERS] = np.nan
+    return z
+
+
+def _timing_partners(z: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """For each player, the other player whose per-question timing deviations correlate most.
+
+    Returns (partner index or -1, correlation, significant). A pair is significant when its
+    correlation clears MIN_TIMING_CORRELATION and a Fisher z-test that accounts for the
+    number of pairs in the room.
+    """
+    n_players = z.shape[0]
+    judged = ~np.isnan(z)
+    counts = judged.sum(axis=1)
+    # Center each player on their own mean so generally fast or slow players don't correlate
+    means = np.divide(np.nansum(z, axis=1), counts, out=np.zeros(n_players), where=counts > 0)
+    centered = np.where(judged, np.clip(z, -5, 5) - means[:, None], 0.0).astype(np.float32)
+    norms = np.sqrt((centered * centered).sum(axis=1))
+    judged_f = judged.astype(np.float32)
+
+    partner = np.full(n_players, -1)
+    best = np.zeros(n_players)
+    shared_best = np.zeros(n_players)
+    for start in range(0, n_players, CORRELATION_BLOCK):
+        block = slice(start, min(start + CORRELATION_BLOCK, n_players))
+        shared = judged_f[block] @ judged_f.T
+        denominator = norms[block, None] * norms[None, :]
+        corr = np.divide(centered[block] @ centered.T, denominator, out=np.zeros(shared.shape), where=denominator > 0)
+        corr[shared < MIN_SHARED_QUESTIONS] = -np.inf
+        corr[np.arange(corr.shape[0]), np.arange(block.start, block.stop)] = -np.inf
+        idx = corr.argmax(axis=1)
+        rows = np.arange(corr.shape[0])
+        found = np.isfinite(corr[rows, idx])
+        partner[block] = np.where(found, idx, -1)
+        best[block] = np.where(found, corr[rows, idx], 0.0)
+        shared_best[block] = shared[rows, idx]
+
+    pairs = n_players * (n_players - 1) / 2
+    z_critical = math.sqrt(2 * math.log(max(pairs, 1) / CORRELATION_ALPHA))
+    fisher = np.arctanh(np.clip(best, -0.999999, 0.999999)) * np.sqrt(np.maximum(shared_best - 3, 0))
+    significant = (partner >= 0) & (best >= MIN_TIMING_CORRELATION) & (fisher >= z_critical)
+    return partner, best, significant
+
+
+def score_session(
+    user_ids: list[str], answered: np.ndarray, correct: np.ndarray, times: np.ndarray,
+    tab_switch_times: list[dict]
+) -> list[dict]:
+    """Anomaly signals and a 0-1 score per player, in user_ids order.
+
+    answered, correct and times are players x questions matrices (see session_stats);
+    tab_switch_times holds each player's {question_index: [seconds into the question]}.
+    """
+    n_players, n_questions = answered.shape
+    n_answered = answered.sum(axis=1)
+
+    z = _timing_z(answered, times)
+    fast_correct = (correct & (z < -FAST_ANSWER_Z)).sum(axis=1)
+
+    partner, correlation, correlated = _timing_partners(z)
+
+    rows, cols, seconds = _pack_switches(tab_switch_times, n_questions)
+    answer_times = times[rows, cols]
+    before = (seconds <= answer_times) & (seconds >= answer_times - TAB_SWITCH_WINDOW_SECONDS)
+    switched = np.bincount(
+        rows[before] * n_questions + cols[before], minlength=n_players * n_questions
+    ).reshape(n_players, n_questions) > 0
+    switched_answers = (switched & answered).sum(axis=1)
+    switched_correct = (switched & correct).sum(axis=1)
+
+    per_answer = np.maximum(n_answered, 1)
+    fast_rate = fast_correct / per_answer
+    switched_rate = switched_correct / per_answer
+    fast_flag = (fast_correct >= MIN_FAST_CORRECT) & (fast_rate >= MIN_FLAG_RATE)
+    switched_flag = (switched_correct >= MIN_SWITCHED_CORRECT) & (switched_rate >= MIN_FLAG_RATE)
+    score = np.maximum.reduce([fast_rate, np.where(correlated, correlation, 0.0), switched_rate])
+
+    results = []
+    for i, user_id in enumerate(user_ids):
+        flags = []
+        if fast_flag[i]:
+            flags.append("fast_correct_answers")
+        if correlated[i]:
+            flags.append("correlated_timing")
+        if switched_flag[i]:
+            flags.append("tab_switch_before_answers")
+        results.append({
+            "user_id": user_id,
+            "score": round(float(score[i]), 3),
+            "flags": flags,
+            "fast_correct_answers": int(fast_correct[i]),
+            "timing_correlation": round(float(correlation[i]), 3),
+            "correlated_with": user_ids[partner[i]] if correlated[i] else None,
+            "switched_before_answers": int(switched_answers[i]),
+            "switched_before_correct": int(switched_correct[i]),
+        })
+    return results
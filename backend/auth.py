@@ -1,3 +1,9 @@
+import asyncio
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -10,6 +16,32 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Payloads of recently verified tokens: token -> payload, least recently used first
+TOKEN_CACHE_SIZE = 4096
+_token_cache: OrderedDict[str, dict] = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+# bcrypt cost factor; existing hashes with a different cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Password hashing runs on its own small pool so it never blocks the event loop.
+# Requests beyond the worker count wait their turn; past the queue limit they get a 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_password_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+_password_stats = {
+    "queued": 0,
+    "in_flight": 0,
+    "completed": 0,
+    "rejected": 0,
+    "max_queued": 0,
+    "wait_ms": 0.0,
+    "run_ms": 0.0,
+}
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -17,7 +49,68 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if a bcrypt hash was made with a different cost than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def _run_password_work(fn, *args):
+    """Run a bcrypt call on the password pool, waiting for a free worker."""
+    if _password_stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        _password_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+        )
+
+    _password_stats["queued"] += 1
+    _password_stats["max_queued"] = max(_password_stats["max_queued"], _password_stats["queued"])
+    queued_at = time.perf_counter()
+    try:
+        await _password_slots.acquire()
+    finally:
+        _password_stats["queued"] -= 1
+    started_at = time.perf_counter()
+    _password_stats["wait_ms"] += (started_at - queued_at) * 1000
+    _password_stats["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, fn, *args)
+    finally:
+        _password_slots.release()
+        _password_stats["in_flight"] -= 1
+        _password_stats["completed"] += 1
+        _password_stats["run_ms"] += (time.perf_counter() - started_at) * 1000
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_work(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_work(get_password_hash, password)
+
+
+def password_pool_stats() -> dict:
+    """Get queueing metrics for the password hashing pool."""
+    completed = _password_stats["completed"]
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "queued": _password_stats["queued"],
+        "in_flight": _password_stats["in_flight"],
+        "completed": completed,
+        "rejected": _password_stats["rejected"],
+        "max_queued": _password_stats["max_queued"],
+        "avg_wait_ms": round(_password_stats["wait_ms"] / completed, 1) if completed else 0.0,
+        "avg_run_ms": round(_password_stats["run_ms"] / completed, 1) if completed else 0.0,
+    }
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -32,12 +125,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_token(token: str) -> Optional[dict]:
+    now = time.time()
+    with _token_cache_lock:
+        payload = _token_cache.get(token)
+        if payload is not None:
+            if payload["exp"] > now:
+                _token_cache.move_to_end(token)
+                return dict(payload)
+            del _token_cache[token]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
 
+    # Only tokens that expire are cached, so a cached entry is never valid for longer than the token
+    if isinstance(payload.get("exp"), (int, float)):
+        with _token_cache_lock:
+            _token_cache[token] = payload
+            while len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+    return dict(payload)
+
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     token = credentials.credentials
@@ -56,3 +165,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid authentication credentials",
         )
     return {"id": user_id, "username": username}
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[dict]:
+    """Like get_current_user, but returns None instead of failing for anonymous or invalid requests."""
+    if credentials is None:
+        return None
+    payload = decode_token(credentials.credentials)
+    if payload is None or payload.get("sub") is None:
+        return None
+    return {"id": payload.get("sub"), "username": payload.get("username")}
@@ -0,0 +1,50 @@
+"""Per-request auth overhead: verifying the JWT on every request (as before) against the
+cache of verified payloads, and the get_current_user dependency on top of it.
+
+Run from the repository root: python backend/benchmarks/bench_auth.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.security import HTTPAuthorizationCredentials
+import auth
+
+REQUESTS = 20000
+
+
+def per_request_us(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        fn()
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+def main():
+    token = auth.create_access_token({"sub": "user-1", "username": "alice"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def full_verify():
+        auth.jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+
+    def cached_decode():
+        auth.decode_token(token)
+
+    async def dependency():
+        for _ in range(REQUESTS):
+            await auth.get_current_user(credentials)
+
+    assert auth.decode_token(token)["sub"] == "user-1"
+    print(f"{REQUESTS} requests with one token")
+    print(f"  full JWT verify:         {per_request_us(full_verify):7.2f} us/request")
+    print(f"  cached decode_token:     {per_request_us(cached_decode):7.2f} us/request")
+    start = time.perf_counter()
+    asyncio.run(dependency())
+    print(f"  cached get_current_user: {(time.perf_counter() - start) / REQUESTS * 1e6:7.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
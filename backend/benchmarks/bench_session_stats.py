@@ -0,0 +1,100 @@
+"""Session question stats for 5,000 players x 100 questions: the NumPy answer matrix
+against the per-player loop it replaced, plus a full save_session.
+
+Run from the repository root: python backend/benchmarks/bench_session_stats.py
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db
+from models import Player, Question, QuestionStat
+from session_stats import pack_answers, correct_matrix, build_question_stats
+import session_manager
+
+N_PLAYERS = 5000
+N_QUESTIONS = 100
+RUNS = 5
+
+
+def make_session(seed: int = 7):
+    rnd = random.Random(seed)
+    questions = [
+        Question(
+            id=str(i), text=f"Question {i}", type="single" if i % 3 else "multiple",
+            options=["a", "b", "c", "d"], correct=[i % 4] if i % 3 else [0, 2]
+        )
+        for i in range(N_QUESTIONS)
+    ]
+    players = {}
+    for p in range(N_PLAYERS):
+        answers = {
+            q: [rnd.randrange(4)] if q % 3 else rnd.sample(range(4), rnd.randint(1, 2))
+            for q in range(N_QUESTIONS) if rnd.random() < 0.95
+        }
+        players[f"p{p}"] = Player(
+            id=f"p{p}", username=f"p{p}", answers=answers, correct_answers=rnd.randint(0, N_QUESTIONS),
+            answer_times={q: rnd.uniform(1, 20) for q in answers}
+        )
+    return questions, players
+
+
+def loop_stats(questions, players) -> list[dict]:
+    """The per-question, per-player loop save_session used before the answer matrix."""
+    question_stats = []
+    for q_idx, question in enumerate(questions):
+        distribution = {}
+        correct_attempts = 0
+        total_attempts = 0
+        for player in players.values():
+            if q_idx in player.answers:
+                total_attempts += 1
+                player_answer = player.answers[q_idx]
+                for answer in player_answer:
+                    distribution[answer] = distribution.get(answer, 0) + 1
+                if sorted(player_answer) == sorted(question.correct):
+                    correct_attempts += 1
+        accuracy = (correct_attempts / total_attempts * 100) if total_attempts > 0 else 0
+        question_stats.append(QuestionStat(
+            question_index=q_idx, question_text=question.text, correct_answers=question.correct,
+            total_attempts=total_attempts, correct_attempts=correct_attempts,
+            accuracy_percentage=round(accuracy, 1), answer_distribution=distribution
+        ).model_dump())
+    return question_stats
+
+
+def matrix_stats(questions, players) -> list[dict]:
+    answered, masks = pack_answers([player.answers for player in players.values()], len(questions))
+    correct = correct_matrix(answered, masks, [question.correct for question in questions])
+    return build_question_stats(questions, answered, masks, correct)
+
+
+def median_ms(fn, *args) -> float:
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    init_db()
+    questions, players = make_session()
+    assert loop_stats(questions, players) == matrix_stats(questions, players)
+
+    print(f"{N_PLAYERS} players x {N_QUESTIONS} questions, median of {RUNS} runs")
+    print(f"  per-player loop:   {median_ms(loop_stats, questions, players):8.1f} ms")
+    print(f"  answer matrix:     {median_ms(matrix_stats, questions, players):8.1f} ms")
+    print(f"  full save_session: {median_ms(session_manager.save_session, 'q1', 'Quiz', 'ROOM', 'host', datetime.utcnow(), players, questions):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Marketplace category counts at 100,000 templates: loading every template (as before)
+against the grouped count query, and the cached result for anonymous and group members.
+
+Run from the repository root: python backend/benchmarks/bench_template_categories.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db, SessionLocal, TemplateDB, UserDB, GroupDB, GroupMemberDB
+from models import TemplateCategory
+import template_manager
+
+N_TEMPLATES = 100_000
+CACHED_CALLS = 1000
+
+
+def seed():
+    categories = [c.value for c in TemplateCategory]
+    db = SessionLocal()
+    try:
+        db.add(UserDB(id="author", username="author"))
+        db.add(GroupDB(id="group", name="group", owner_id="author"))
+        db.add(GroupMemberDB(group_id="group", user_id="author", role="owner"))
+        db.bulk_insert_mappings(TemplateDB, [
+            dict(
+                id=str(i), quiz_id=str(i), name=f"Template {i}", description="", category=categories[i % len(categories)],
+                author_id="author", author_name="author", created_at=datetime.utcnow(), tags=[],
+                visibility="group" if i % 10 == 0 else "public", group_id="group" if i % 10 == 0 else None
+            )
+            for i in range(N_TEMPLATES)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def full_scan() -> dict:
+    """Count by loading every template, as get_categories_with_counts did before."""
+    db = SessionLocal()
+    try:
+        counts = {}
+        for template in db.query(TemplateDB).all():
+            counts[template.category] = counts.get(template.category, 0) + 1
+        return counts
+    finally:
+        db.close()
+
+
+def timed_ms(fn, *args, calls: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / calls
+
+
+def main():
+    init_db()
+    seed()
+    print(f"{N_TEMPLATES} templates")
+    print(f"  full scan:             {timed_ms(full_scan):9.3f} ms")
+    template_manager.invalidate_template_caches()
+    print(f"  grouped query (cold):  {timed_ms(template_manager.get_categories_with_counts):9.3f} ms")
+    print(f"  cached, anonymous:     {timed_ms(template_manager.get_categories_with_counts, calls=CACHED_CALLS):9.3f} ms")
+    print(f"  cached, group member:  {timed_ms(template_manager.get_categories_with_counts, 'author', calls=CACHED_CALLS):9.3f} ms")
+
+    anonymous = sum(c["count"] for c in template_manager.get_categories_with_counts())
+    member = sum(c["count"] for c in template_manager.get_categories_with_counts("author"))
+    assert (anonymous, member) == (N_TEMPLATES - N_TEMPLATES // 10, N_TEMPLATES)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey, inspect, text
+from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey, Index, inspect, text, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import sessionmaker, relationship
@@ -40,13 +40,20 @@ class UserDB(Base):
     group_memberships = relationship("GroupMemberDB", back_populates="user", cascade="all, delete-orphan")
 
 
+# Case-insensitive lookups compare lower(username) / lower(email), so index those expressions
+Index("ix_users_username_lower", func.lower(UserDB.username))
+Index("ix_users_email_lower", func.lower(UserDB.email))
+
+
 class QuizDB(Base):
     __tablename__ = "quizzes"
 
     id = Column(String, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
-    questions = Column(MutableList.as_mutable(JSON), default=list)  # Store questions as JSON array
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    questions = Column(MutableList.as_mutable(JSON(none_as_null=True)), default=list)  # Store questions as JSON array; NULL while sharing a question set
+    question_set_id = Column(String, ForeignKey("question_sets.id"), nullable=True, index=True)  # Shared questions of a template clone
+    questions_version = Column(Integer, default=0)  # Bumped on every question change, for optimistic edits
     hide_results = Column(Boolean, default=False)
     fun_mode = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -54,6 +61,16 @@ class QuizDB(Base):
     # Relationships
     owner = relationship("UserDB", back_populates="quizzes")
     sessions = relationship("SessionDB", back_populates="quiz", cascade="all, delete-orphan")
+    analytics = relationship("QuizAnalyticsDB", cascade="all, delete-orphan", uselist=False)
+
+
+# Immutable question snapshot shared by a template's source quiz and its clones
+class QuestionSetDB(Base):
+    __tablename__ = "question_sets"
+
+    id = Column(String, primary_key=True, index=True)
+    questions = Column(JSON, nullable=False)  # Never updated once written
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class SessionDB(Base):
@@ -69,11 +86,32 @@ class SessionDB(Base):
     total_questions = Column(Integer, default=0)
     participants = Column(JSON, default=list)  # Store as JSON array
     question_stats = Column(JSON, default=list)  # Store as JSON array
+    anomalies = Column(JSON, nullable=True)  # Per-player cheat-detection scores (see anomaly_detection.py)
 
     # Relationships
     quiz = relationship("QuizDB", back_populates="sessions")
 
 
+# A quiz's sessions are listed newest first
+Index("ix_sessions_quiz_id_ended_at", SessionDB.quiz_id, SessionDB.ended_at)
+
+
+# Running totals over all sessions of a quiz, updated as each session is saved
+class QuizAnalyticsDB(Base):
+    __tablename__ = "quiz_analytics"
+
+    quiz_id = Column(String, ForeignKey("quizzes.id"), primary_key=True)
+    total_sessions = Column(Integer, default=0)
+    total_participants = Column(Integer, default=0)
+    total_score = Column(Integer, default=0)
+    total_correct = Column(Integer, default=0)
+    total_questions_answered = Column(Integer, default=0)  # Questions per session, summed over participants
+    question_stats = Column(JSON, default=list)  # Per question index: {"attempts": n, "correct": n}
+    item_stats = Column(JSON, nullable=True)  # Item-analysis sums (see item_analysis.py), built on first use
+    backfill_before = Column(DateTime, nullable=True)  # Sessions that ended before this are not in the totals yet
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
 class TemplateDB(Base):
     __tablename__ = "templates"
 
@@ -129,8 +167,8 @@ class GroupMemberDB(Base):
     __tablename__ = "group_members"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    group_id = Column(String, ForeignKey("groups.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    group_id = Column(String, ForeignKey("groups.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     role = Column(String, default="member")  # "owner" or "member"
     joined_at = Column(DateTime, default=datetime.utcnow)
 
@@ -139,6 +177,19 @@ class GroupMemberDB(Base):
     user = relationship("UserDB", back_populates="group_memberships")
 
 
+class AIGenerationCacheDB(Base):
+    __tablename__ = "ai_generation_cache"
+
+    key = Column(String, primary_key=True)  # Hash of the normalized prompt and model parameters
+    prompt = Column(Text, nullable=False)
+    model = Column(String, nullable=False)
+    questions = Column(JSON, default=list)
+    generation_ms = Column(Float, default=0.0)  # How long the model call took
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 def _migrate_db():
     """Add missing columns to existing tables."""
     inspector = inspect(engine)
@@ -154,6 +205,38 @@ def _migrate_db():
             if "group_id" not in columns:
                 conn.execute(text("ALTER TABLE templates ADD COLUMN group_id VARCHAR"))
 
+    if "quizzes" in inspector.get_table_names():
+        columns = [col["name"] for col in inspector.get_columns("quizzes")]
+        with engine.begin() as conn:
+            if "question_set_id" not in columns:
+                conn.execute(text("ALTER TABLE quizzes ADD COLUMN question_set_id VARCHAR REFERENCES question_sets(id)"))
+            if "questions_version" not in columns:
+                conn.execute(text("ALTER TABLE quizzes ADD COLUMN questions_version INTEGER DEFAULT 0"))
+
+    if "sessions" in inspector.get_table_names():
+        columns = [col["name"] for col in inspector.get_columns("sessions")]
+        with engine.begin() as conn:
+            if "anomalies" not in columns:
+                conn.execute(text("ALTER TABLE sessions ADD COLUMN anomalies JSON"))
+
+    if "quiz_analytics" in inspector.get_table_names():
+        columns = [col["name"] for col in inspector.get_columns("quiz_analytics")]
+        with engine.begin() as conn:
+            if "item_stats" not in columns:
+                conn.execute(text("ALTER TABLE quiz_analytics ADD COLUMN item_stats JSON"))
+            if "backfill_before" not in columns:
+                conn.execute(text("ALTER TABLE quiz_analytics ADD COLUMN backfill_before TIMESTAMP"))
+
+    # Indexes added after the tables were first created
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_quizzes_owner_id ON quizzes (owner_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_quizzes_question_set_id ON quizzes (question_set_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_quiz_id_ended_at ON sessions (quiz_id, ended_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_group_members_group_id ON group_members (group_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_group_members_user_id ON group_members (user_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_username_lower ON users (lower(username))"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_email_lower ON users (lower(email))"))
+
 
 def init_db():
     """Initialize database tables."""
@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from database import SessionLocal, UserDB, QuizDB, QuestionSetDB, TemplateDB, SessionDB
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+USER_FIELDS = ["id", "username", "email", "created_at"]
+QUIZ_FIELDS = ["id", "name", "owner_id", "owner_username", "question_count", "hide_results", "fun_mode", "created_at"]
+TEMPLATE_FIELDS = [
+    "id", "quiz_id", "name", "category", "author_id", "author_name", "visibility",
+    "group_id", "questions_count", "uses_count", "rating", "ratings_count", "created_at"
+]
+SESSION_RESULT_FIELDS = [
+    "session_id", "room_code", "started_at", "ended_at", "total_questions",
+    "user_id", "username", "score", "correct_answers", "wrong_answers", "tab_switches"
+]
+
+
+def _iso(value) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _stream(db, statement):
+    """Execute a select on a server-side cursor, fetching EXPORT_BATCH_SIZE rows at a time."""
+    return db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+
+def iter_users():
+    """Yield every user as a dict, streamed from a server-side cursor."""
+    db = SessionLocal()
+    try:
+        statement = select(UserDB.id, UserDB.username, UserDB.email, UserDB.created_at).order_by(UserDB.created_at)
+        for user_id, username, email, created_at in _stream(db, statement):
+            yield {"id": user_id, "username": username, "email": email, "created_at": _iso(created_at)}
+    finally:
+        db.close()
+
+
+def iter_quizzes():
+    """Yield every quiz with its owner's username, streamed from a server-side cursor."""
+    db = SessionLocal()
+    try:
+        statement = (
+            select(
+                QuizDB.id, QuizDB.name, QuizDB.owner_id, UserDB.username, QuizDB.questions,
+                QuestionSetDB.questions, QuizDB.hide_results, QuizDB.fun_mode, QuizDB.created_at
+            )
+            .join(UserDB, QuizDB.owner_id == UserDB.id)
+            .outerjoin(QuestionSetDB, QuestionSetDB.id == QuizDB.question_set_id)
+            .order_by(QuizDB.created_at)
+        )
+        for quiz_id, name, owner_id, owner_username, questions, shared, hide_results, fun_mode, created_at in _stream(db, statement):
+            questions = questions if questions is not None else shared
+            yield {
+                "id": quiz_id,
+                "name": name,
+                "owner_id": owner_id,
+                "owner_username": owner_username,
+                "question_count": len(questions) if questions else 0,
+                "hide_results": bool(hide_results),
+                "fun_mode": bool(fun_mode),
+                "created_at": _iso(created_at),
+            }
+    finally:
+        db.close()
+
+
+def iter_templates():
+    """Yield every template, streamed from a server-side cursor."""
+    db = SessionLocal()
+    try:
+        columns = [getattr(TemplateDB, field) for field in TEMPLATE_FIELDS]
+        statement = select(*columns).order_by(TemplateDB.created_at)
+        for row in _stream(db, statement):
+            item = dict(zip(TEMPLATE_FIELDS, row))
+            item["created_at"] = _iso(item["created_at"])
+            yield item
+    finally:
+        db.close()
+
+
+def iter_session_results(quiz_id: str):
+    """Yield one row per participant per session of a quiz, oldest session first."""
+    db = SessionLocal()
+    try:
+        statement = (
+            select(
+                SessionDB.id, SessionDB.room_code, SessionDB.started_at, SessionDB.ended_at,
+                SessionDB.total_questions, SessionDB.participants
+            )
+            .filter(SessionDB.quiz_id == quiz_id)
+            .order_by(SessionDB.ended_at)
+        )
+        for session_id, room_code, started_at, ended_at, total_questions, participants in _stream(db, statement):
+            for p in participants or []:
+                yield {
+                    "session_id": session_id,
+                    "room_code": room_code,
+                    "started_at": _iso(started_at),
+                    "ended_at": _iso(ended_at),
+                    "total_questions": total_questions,
+                    "user_id": p.get("user_id"),
+                    "username": p.get("username"),
+                    "score": p.get("score", 0),
+                    "correct_answers": p.get("correct_answers", 0),
+                    "wrong_answers": p.get("wrong_answers", 0),
+                    "tab_switches": p.get("tab_switches", 0),
+                }
+    finally:
+        db.close()
+
+
+def encode_rows(rows, fields: list[str], fmt: str, chunk_rows: int = 500):
+    """Encode dict rows as NDJSON or CSV, yielding byte chunks of a few hundred rows."""
+    if fmt == "ndjson":
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps(row, separators=(",", ":")))
+            if len(chunk) >= chunk_rows:
+                yield ("\n".join(chunk) + "\n").encode("utf-8")
+                chunk = []
+        if chunk:
+            yield ("\n".join(chunk) + "\n").encode("utf-8")
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
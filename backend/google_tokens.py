@@ -0,0 +1,125 @@
+import asyncio
+import os
+import re
+import time
+from typing import Optional
+import httpx
+from jose import JWTError, jwt
+
+# Google's signing keys (JWKS) and the remote tokeninfo endpoint used as a fallback.
+# Both can be pointed at a local stand-in for testing.
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_TOKENINFO_URL = os.getenv("GOOGLE_TOKENINFO_URL", "https://oauth2.googleapis.com/tokeninfo")
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")  # Audience check is skipped if unset
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+DEFAULT_KEYS_MAX_AGE = 3600  # Used when the certs response has no max-age
+MIN_REFRESH_INTERVAL = 60  # Don't refetch for unknown key IDs more often than this
+
+_client: Optional[httpx.AsyncClient] = None
+_keys: dict = {"jwks": None, "expires_at": 0.0, "fetched_at": 0.0}
+_refresh_lock = asyncio.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled HTTP client for Google endpoints."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(5.0))
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _max_age(response: httpx.Response) -> int:
+    match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+    if not match:
+        return DEFAULT_KEYS_MAX_AGE
+    age = int(response.headers.get("age", "0") or 0)
+    return max(int(match.group(1)) - age, 0)
+
+
+async def _refresh_keys(force: bool = False) -> Optional[dict]:
+    """Fetch the signing keys if the cached copy is stale. Returns the freshest keys available."""
+    async with _refresh_lock:
+        now = time.time()
+        if _keys["jwks"] and now < _keys["expires_at"] and not force:
+            return _keys["jwks"]
+        if force and now - _keys["fetched_at"] < MIN_REFRESH_INTERVAL:
+            return _keys["jwks"]
+        try:
+            response = await get_http_client().get(GOOGLE_CERTS_URL)
+            response.raise_for_status()
+            jwks = response.json()
+            _keys["jwks"] = jwks
+            _keys["fetched_at"] = now
+            _keys["expires_at"] = now + _max_age(response)
+        except (httpx.HTTPError, ValueError) as e:
+            # Keep serving stale keys rather than failing every sign-in
+            print(f"WARNING: Could not refresh Google signing keys: {e}")
+        return _keys["jwks"]
+
+
+def _find_key(jwks: dict, kid: str | None) -> Optional[dict]:
+    for key in jwks.get("keys", []):
+        if key.get("kid") == kid:
+            return key
+    return None
+
+
+def _decode(credential: str, key: dict) -> Optional[dict]:
+    try:
+        claims = jwt.decode(
+            credential,
+            key,
+            algorithms=[key.get("alg", "RS256")],
+            audience=GOOGLE_CLIENT_ID,
+            options={"verify_aud": bool(GOOGLE_CLIENT_ID), "verify_at_hash": False},
+        )
+    except JWTError:
+        return None
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        return None
+    return claims
+
+
+async def _verify_remotely(credential: str) -> Optional[dict]:
+    """Validate through Google's tokeninfo endpoint. Raises httpx.RequestError if unreachable."""
+    response = await get_http_client().get(GOOGLE_TOKENINFO_URL, params={"id_token": credential})
+    if response.status_code != 200:
+        return None
+    claims = response.json()
+    if GOOGLE_CLIENT_ID and claims.get("aud") != GOOGLE_CLIENT_ID:
+        return None
+    return claims
+
+
+async def verify_google_id_token(credential: str) -> Optional[dict]:
+    """Verify a Google ID token and return its claims, or None if it is invalid.
+
+    Checks the signature locally against cached signing keys. If no keys can be
+    loaded at all, falls back to the tokeninfo endpoint; raises httpx.RequestError
+    if that is unreachable too.
+    """
+    try:
+        kid = jwt.get_unverified_header(credential).get("kid")
+    except JWTError:
+        return None
+
+    jwks = await _refresh_keys()
+    key = _find_key(jwks, kid) if jwks else None
+    if jwks and not key:
+        # Google rotates keys; an unknown key ID means our copy may be out of date
+        jwks = await _refresh_keys(force=True)
+        key = _find_key(jwks, kid) if jwks else None
+        if jwks and not key:
+            return None
+
+    if key:
+        return _decode(credential, key)
+    return await _verify_remotely(credential)
@@ -1,10 +1,39 @@
 import uuid
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+from sqlalchemy import func, select, insert, or_
 from database import SessionLocal, GroupDB, GroupMemberDB, UserDB
 from models import Group
 
+# Members returned per group by default; larger groups are paged through get_group
+MEMBER_PAGE_SIZE = 100
+MAX_MEMBER_PAGE_SIZE = 500
 
-def _build_group(db_group, members_list=None) -> Group:
+# Cached group memberships: user_id -> (group_ids, stored_at), least recently used first
+_membership_cache: OrderedDict[str, tuple[frozenset[str], float]] = OrderedDict()
+_membership_lock = threading.Lock()
+_membership_generation = 0  # Bumped on invalidation so memberships read before it are not stored
+MEMBERSHIP_CACHE_TTL_SECONDS = 60.0
+MEMBERSHIP_CACHE_SIZE = 10000
+
+MAX_BULK_INVITE = 1000
+
+
+def invalidate_membership_cache(user_ids=None):
+    """Drop cached memberships for the given users, or for everyone if None."""
+    global _membership_generation
+    with _membership_lock:
+        _membership_generation += 1
+        if user_ids is None:
+            _membership_cache.clear()
+            return
+        for user_id in user_ids:
+            _membership_cache.pop(user_id, None)
+
+
+def _build_group(db_group, members_list=None, member_count: int | None = None) -> Group:
     """Build a Group model from a DB group object."""
     members = members_list or []
     return Group(
@@ -12,11 +41,15 @@ def _build_group(db_group, members_list=None) -> Group:
         name=db_group.name,
         owner_id=db_group.owner_id,
         created_at=db_group.created_at.isoformat(),
-        member_count=len(members),
+        member_count=member_count if member_count is not None else len(members),
         members=members
     )
 
 
+def _member_dict(user_id: str, username: str | None, role: str) -> dict:
+    return {"id": user_id, "username": username or "Unknown", "role": role}
+
+
 def create_group(name: str, owner_id: str) -> Group:
     """Create a new group and auto-add the owner as a member with role 'owner'."""
     db = SessionLocal()
@@ -40,6 +73,7 @@ def create_group(name: str, owner_id: str) -> Group:
         db.add(owner_member)
         db.commit()
         db.refresh(db_group)
+        invalidate_membership_cache([owner_id])
 
         # Get owner username
         owner = db.query(UserDB).filter(UserDB.id == owner_id).first()
@@ -51,51 +85,91 @@ def create_group(name: str, owner_id: str) -> Group:
         db.close()
 
 
-def get_group(group_id: str) -> Group | None:
-    """Get a group with member count and members list."""
+def get_group(group_id: str, member_offset: int = 0, member_limit: int = MEMBER_PAGE_SIZE) -> Group | None:
+    """Get a group with its member count and one page of members."""
+    member_limit = max(1, min(member_limit, MAX_MEMBER_PAGE_SIZE))
     db = SessionLocal()
     try:
-        db_group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
-        if not db_group:
+        row = (
+            db.query(GroupDB, func.count(GroupMemberDB.id))
+            .outerjoin(GroupMemberDB, GroupMemberDB.group_id == GroupDB.id)
+            .filter(GroupDB.id == group_id)
+            .group_by(GroupDB.id)
+            .first()
+        )
+        if not row:
             return None
+        db_group, member_count = row
 
-        # Get members with usernames
-        memberships = db.query(GroupMemberDB).filter(GroupMemberDB.group_id == group_id).all()
-        members = []
-        for m in memberships:
-            user = db.query(UserDB).filter(UserDB.id == m.user_id).first()
-            members.append({
-                "id": m.user_id,
-                "username": user.username if user else "Unknown",
-                "role": m.role
-            })
+        # Get one page of members with usernames
+        rows = (
+            db.query(GroupMemberDB.user_id, UserDB.username, GroupMemberDB.role)
+            .outerjoin(UserDB, UserDB.id == GroupMemberDB.user_id)
+            .filter(GroupMemberDB.group_id == group_id)
+            .order_by(GroupMemberDB.joined_at, GroupMemberDB.id)
+            .offset(max(member_offset, 0))
+            .limit(member_limit)
+            .all()
+        )
+        members = [_member_dict(user_id, username, role) for user_id, username, role in rows]
 
-        return _build_group(db_group, members)
+        return _build_group(db_group, members, member_count)
     finally:
         db.close()
 
 
-def get_user_groups(user_id: str) -> list[Group]:
-    """Get all groups a user is a member of."""
+def get_user_groups(user_id: str, member_limit: int = MEMBER_PAGE_SIZE) -> list[Group]:
+    """Get all groups a user is a member of, each with its member count and first page of members."""
+    member_limit = max(1, min(member_limit, MAX_MEMBER_PAGE_SIZE))
     db = SessionLocal()
     try:
-        memberships = db.query(GroupMemberDB).filter(GroupMemberDB.user_id == user_id).all()
-        groups = []
-        for m in memberships:
-            db_group = db.query(GroupDB).filter(GroupDB.id == m.group_id).first()
-            if db_group:
-                # Get all members for this group
-                group_members = db.query(GroupMemberDB).filter(GroupMemberDB.group_id == db_group.id).all()
-                members = []
-                for gm in group_members:
-                    user = db.query(UserDB).filter(UserDB.id == gm.user_id).first()
-                    members.append({
-                        "id": gm.user_id,
-                        "username": user.username if user else "Unknown",
-                        "role": gm.role
-                    })
-                groups.append(_build_group(db_group, members))
-        return groups
+        user_group_ids = select(GroupMemberDB.group_id).where(GroupMemberDB.user_id == user_id)
+
+        member_counts = (
+            select(GroupMemberDB.group_id, func.count(GroupMemberDB.id).label("member_count"))
+            .where(GroupMemberDB.group_id.in_(user_group_ids))
+            .group_by(GroupMemberDB.group_id)
+            .subquery()
+        )
+        group_rows = (
+            db.query(GroupDB, member_counts.c.member_count)
+            .join(member_counts, member_counts.c.group_id == GroupDB.id)
+            .order_by(GroupDB.created_at)
+            .all()
+        )
+        if not group_rows:
+            return []
+
+        # First page of members for every group at once, numbered per group
+        ranked = (
+            select(
+                GroupMemberDB.group_id,
+                GroupMemberDB.user_id,
+                UserDB.username,
+                GroupMemberDB.role,
+                func.row_number().over(
+                    partition_by=GroupMemberDB.group_id,
+                    order_by=(GroupMemberDB.joined_at, GroupMemberDB.id)
+                ).label("position")
+            )
+            .outerjoin(UserDB, UserDB.id == GroupMemberDB.user_id)
+            .where(GroupMemberDB.group_id.in_(user_group_ids))
+            .subquery()
+        )
+        member_rows = db.execute(
+            select(ranked.c.group_id, ranked.c.user_id, ranked.c.username, ranked.c.role)
+            .where(ranked.c.position <= member_limit)
+            .order_by(ranked.c.group_id, ranked.c.position)
+        ).all()
+
+        members_by_group: dict[str, list[dict]] = {}
+        for group_id, member_id, username, role in member_rows:
+            members_by_group.setdefault(group_id, []).append(_member_dict(member_id, username, role))
+
+        return [
+            _build_group(db_group, members_by_group.get(db_group.id, []), member_count)
+            for db_group, member_count in group_rows
+        ]
     finally:
         db.close()
 
@@ -125,6 +199,7 @@ def add_member(group_id: str, user_id: str, role: str = "member") -> bool:
         )
         db.add(member)
         db.commit()
+        invalidate_membership_cache([user_id])
         return True
     finally:
         db.close()
@@ -147,6 +222,7 @@ def remove_member(group_id: str, user_id: str) -> bool:
 
         db.delete(membership)
         db.commit()
+        invalidate_membership_cache([user_id])
         return True
     finally:
         db.close()
@@ -163,8 +239,10 @@ def delete_group(group_id: str, user_id: str) -> bool:
         if db_group.owner_id != user_id:
             return False
 
+        member_ids = [m.user_id for m in db_group.members]
         db.delete(db_group)
         db.commit()
+        invalidate_membership_cache(member_ids)
         return True
     finally:
         db.close()
@@ -172,16 +250,34 @@ def delete_group(group_id: str, user_id: str) -> bool:
 
 def is_group_member(group_id: str, user_id: str) -> bool:
     """Check if a user is a member of a group."""
+    return group_id in get_user_group_ids(user_id)
+
+
+def get_user_group_ids(user_id: str) -> frozenset[str]:
+    """Get the IDs of all groups a user is a member of. Cached per user."""
+    now = time.monotonic()
+    with _membership_lock:
+        cached = _membership_cache.get(user_id)
+        if cached and now - cached[1] <= MEMBERSHIP_CACHE_TTL_SECONDS:
+            _membership_cache.move_to_end(user_id)
+            return cached[0]
+        generation = _membership_generation
+
     db = SessionLocal()
     try:
-        membership = db.query(GroupMemberDB).filter(
-            GroupMemberDB.group_id == group_id,
-            GroupMemberDB.user_id == user_id
-        ).first()
-        return membership is not None
+        rows = db.query(GroupMemberDB.group_id).filter(GroupMemberDB.user_id == user_id).all()
+        group_ids = frozenset(group_id for (group_id,) in rows)
     finally:
         db.close()
 
+    with _membership_lock:
+        if generation == _membership_generation:
+            _membership_cache[user_id] = (group_ids, now)
+            _membership_cache.move_to_end(user_id)
+            while len(_membership_cache) > MEMBERSHIP_CACHE_SIZE:
+                _membership_cache.popitem(last=False)
+    return group_ids
+
 
 def invite_by_username(group_id: str, username: str) -> dict | None:
     """Find a user by username or email and add them to the group. Returns {id, username} or None."""
@@ -209,6 +305,66 @@ def invite_by_username(group_id: str, username: str) -> dict | None:
         )
         db.add(member)
         db.commit()
+        invalidate_membership_cache([user.id])
         return {"id": user.id, "username": user.username}
     finally:
         db.close()
+
+
+def bulk_invite(group_id: str, identifiers: list[str]) -> list[dict]:
+    """Add many users to a group by username or email.
+
+    Resolves all identifiers in one query, checks existing memberships in one query and
+    inserts the new memberships in one batch. Returns one result per input row.
+    """
+    cleaned = [i.strip() for i in identifiers]
+    wanted = {i for i in cleaned if i}
+    db = SessionLocal()
+    try:
+        users = []
+        if wanted:
+            users = db.query(UserDB.id, UserDB.username, UserDB.email).filter(
+                or_(UserDB.username.in_(wanted), UserDB.email.in_({i.lower() for i in wanted}))
+            ).all()
+        by_username = {u.username: u for u in users}
+        by_email = {u.email: u for u in users if u.email}
+
+        existing = set()
+        if users:
+            rows = db.query(GroupMemberDB.user_id).filter(
+                GroupMemberDB.group_id == group_id,
+                GroupMemberDB.user_id.in_({u.id for u in users})
+            ).all()
+            existing = {user_id for (user_id,) in rows}
+
+        results = []
+        new_members = []
+        seen = set()
+        for identifier in cleaned:
+            user = by_username.get(identifier) or by_email.get(identifier.lower())
+            if not user:
+                results.append({"input": identifier, "status": "not_found", "user": None})
+                continue
+            found = {"id": user.id, "username": user.username}
+            if user.id in existing:
+                status = "already_member"
+            elif user.id in seen:
+                status = "duplicate"
+            else:
+                status = "added"
+                seen.add(user.id)
+                new_members.append({
+                    "group_id": group_id,
+                    "user_id": user.id,
+                    "role": "member",
+                    "joined_at": datetime.utcnow()
+                })
+            results.append({"input": identifier, "status": status, "user": found})
+
+        if new_members:
+            db.execute(insert(GroupMemberDB), new_members)
+            db.commit()
+            invalidate_membership_cache([m["user_id"] for m in new_members])
+        return results
+    finally:
+        db.close()
@@ -0,0 +1,149 @@
+import csv
+import io
+import json
+import re
+from pydantic import ValidationError
+from database import SessionLocal, QuizDB
+from models import Question, QuestionCreate
+from template_manager import invalidate_quiz_template_details
+from quiz_manager import own_quiz_questions, replace_quiz_questions, bump_questions_version
+
+# Valid rows are appended to the quiz and committed at least this many at a time
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+def _split_list(value: str) -> list[str]:
+    return [part.strip() for part in re.split(r"[|;]", value) if part.strip()]
+
+
+def _csv_row_to_dict(row: dict) -> dict:
+    """Map a CSV row to question fields.
+
+    Options come from an `options` column separated by "|" or from option1..option6
+    columns; `correct` holds 0-based indices separated by "|".
+    """
+    data = {"text": (row.get("text") or "").strip()}
+    if row.get("options"):
+        data["options"] = _split_list(row["options"])
+    else:
+        data["options"] = [
+            row[f"option{i}"].strip() for i in range(1, 7) if (row.get(f"option{i}") or "").strip()
+        ]
+    data["correct"] = _split_list(row.get("correct") or "")
+    for field in ("type", "time_limit", "points"):
+        if (row.get(field) or "").strip():
+            data[field] = row[field].strip()
+    return data
+
+
+def iter_ndjson_rows(stream):
+    """Yield (line_number, row) from a binary NDJSON stream. Rows that are not JSON objects
+    are yielded as (line_number, error message)."""
+    for line_number, raw in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def iter_csv_rows(stream):
+    """Yield (line_number, row) from a binary CSV stream with a header row."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for row in reader:
+        yield reader.line_num, _csv_row_to_dict(row)
+
+
+def _validate(row: dict) -> QuestionCreate:
+    question = QuestionCreate(**row)
+    if not question.text.strip():
+        raise ValueError("text is empty")
+    if len(question.options) < 2:
+        raise ValueError("at least 2 options are required")
+    if not question.correct:
+        raise ValueError("correct is empty")
+    if any(c < 0 or c >= len(question.options) for c in question.correct):
+        raise ValueError("correct index out of range")
+    return question
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+        )
+    return str(e)
+
+
+def import_question_rows(quiz_id: str, rows, replace: bool = False) -> dict | None:
+    """Validate (line_number, row) pairs and append the valid ones to a quiz in batches.
+
+    Each batch is its own transaction, so rows before a failure stay imported. With replace, existing questions are dropped by the first
+    batch. Returns counts and the first MAX_REPORTED_ERRORS row errors, or None if the
+    quiz does not exist.
+    """
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        quiz = db.query(QuizDB).filter(QuizDB.id == quiz_id).first()
+        if not quiz:
+            return None
+
+        imported = 0
+        failed = 0
+        errors = []
+        batch = []
+        pending_replace = replace
+        question_count = len(quiz.questions or [])
+
+        def flush() -> bool:
+            """Append the batch to the quiz as it is now; False if the quiz was deleted meanwhile."""
+            nonlocal quiz, imported, pending_replace, question_count
+            # Re-read and lock the row so edits made since the last batch aren't overwritten
+            quiz = db.query(QuizDB).filter(QuizDB.id == quiz_id).with_for_update().populate_existing().first()
+            if not quiz:
+                return False
+            if pending_replace:
+                replace_quiz_questions(db, quiz, [])
+                pending_replace = False
+            questions = own_quiz_questions(db, quiz)
+            questions.extend(batch)
+            question_count = len(questions)
+            bump_questions_version(quiz)
+            db.commit()
+            imported += len(batch)
+            batch.clear()
+            return True
+
+        for line_number, row in rows:
+            try:
+                if isinstance(row, str):
+                    raise ValueError(row)
+                question = _validate(row)
+            except (ValidationError, ValueError, TypeError) as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": line_number, "error": _error_message(e)})
+                continue
+            batch.append(Question(**question.model_dump()).model_dump())
+            # Questions live in one JSON array that every batch re-reads and rewrites in full,
+            # so let batches grow with the array to keep the total cost linear
+            if len(batch) >= max(IMPORT_BATCH_SIZE, question_count):
+                if not flush():
+                    return None
+        if batch and not flush():
+            return None
+
+        if imported:
+            invalidate_quiz_template_details(quiz_id)
+        return {
+            "count": imported,
+            "failed": failed,
+            "errors": errors,
+            "errors_truncated": failed > len(errors),
+        }
+    finally:
+        db.close()
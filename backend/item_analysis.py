@@ -0,0 +1,241 @@
+import numpy as np
+from database import SessionLocal, SessionDB, QuizAnalyticsDB
+from models import Quiz
+from session_stats import pack_answers, pack_times, correct_matrix, option_counts
+
+# Item analysis: how hard each question is, how well it separates strong players from
+# weak ones, which wrong options attract players and how long answers take.
+# Everything is kept as per-question sums that add up across sessions, so each new
+# session is folded into the stored sums without revisiting older ones.
+TIME_BIN_SECONDS = 0.5
+TIME_BINS = 240  # The last bin also holds anything slower
+TIME_PERCENTILES = (25, 50, 75, 90)
+
+MIN_FLAG_ATTEMPTS = 10  # Attempts needed before a question is flagged
+EASY_DIFFICULTY = 0.9  # Proportion correct above which a question is too easy
+HARD_DIFFICULTY = 0.3  # ... and below which it is too hard
+LOW_DISCRIMINATION = 0.2
+MIN_DISTRACTOR_RATE = 0.05  # Share of attempts a wrong option needs to be a working distractor
+
+# Per question: attempts, correct attempts, and over attempts the rest score (correct
+# answers on the session's other questions), its square, and its total among correct ones
+_VECTOR_FIELDS = ("attempts", "correct", "rest", "rest_sq", "rest_correct")
+# Per question x option: selections and selectors' rest scores; per question x bin: answer times
+_MATRIX_FIELDS = ("option_counts", "option_rest", "time_histogram")
+
+
+def _empty_sums() -> dict:
+    sums = {field: np.zeros(0, dtype=np.int64) for field in _VECTOR_FIELDS}
+    sums.update({field: np.zeros((0, 0), dtype=np.int64) for field in _MATRIX_FIELDS})
+    sums["time_histogram"] = np.zeros((0, TIME_BINS), dtype=np.int64)
+    return sums
+
+
+def _pad(a: np.ndarray, shape: tuple) -> np.ndarray:
+    if a.shape == shape:
+        return a
+    padded = np.zeros(shape, dtype=a.dtype)
+    padded[tuple(slice(0, n) for n in a.shape)] = a
+    return padded
+
+
+def merge_sums(a: dict, b: dict) -> dict:
+    """Add two sets of sums, padding to the larger number of questions and options."""
+    merged = {}
+    for field in _VECTOR_FIELDS + _MATRIX_FIELDS:
+        shape = tuple(np.maximum(a[field].shape, b[field].shape))
+        merged[field] = _pad(a[field], shape) + _pad(b[field], shape)
+    return merged
+
+
+def session_sums(answered: np.ndarray, masks: np.ndarray, correct: np.ndarray, times: np.ndarray) -> dict:
+    """Item-analysis sums for one session, from its players x questions matrices."""
+    n_questions = answered.shape[1]
+    correct_i = correct.astype(np.int64)
+    rest = np.where(answered, correct_i.sum(axis=1, keepdims=True) - correct_i, 0)
+
+    counts = option_counts(answered, masks)
+    option_rest = np.zeros_like(counts)
+    for option in range(counts.shape[1]):
+        selected = ((masks >> np.uint64(option)) & np.uint64(1)).astype(np.int64)
+        option_rest[:, option] = (selected * rest).sum(axis=0)
+
+    timed = answered & ~np.isnan(times)
+    cols = np.nonzero(timed)[1]
+    bins = np.clip((times[timed] / TIME_BIN_SECONDS).astype(np.int64), 0, TIME_BINS - 1)
+    histogram = np.bincount(cols * TIME_BINS + bins, minlength=n_questions * TIME_BINS)
+
+    return {
+        "attempts": answered.sum(axis=0).astype(np.int64),
+        "correct": correct_i.sum(axis=0),
+        "rest": rest.sum(axis=0),
+        "rest_sq": (rest * rest).sum(axis=0),
+        "rest_correct": (rest * correct_i).sum(axis=0),
+        "option_counts": counts,
+        "option_rest": option_rest,
+        "time_histogram": histogram.reshape(n_questions, TIME_BINS),
+    }
+
+
+def sums_to_json(sums: dict) -> dict:
+    return {field: values.tolist() for field, values in sums.items()}
+
+
+def sums_from_json(data: dict) -> dict:
+    sums = _empty_sums()
+    for field in _VECTOR_FIELDS:
+        sums[field] = np.array(data[field], dtype=np.int64)
+    for field in _MATRIX_FIELDS:
+        if data[field]:
+            sums[field] = np.array(data[field], dtype=np.int64)
+    return sums
+
+
+def add_session(stored: dict, answered: np.ndarray, masks: np.ndarray, correct: np.ndarray, times: np.ndarray) -> dict:
+    """Fold one session into stored (JSON) sums and return the new JSON."""
+    return sums_to_json(merge_sums(sums_from_json(stored), session_sums(answered, masks, correct, times)))
+
+
+def _sums_from_sessions(db, quiz_id: str) -> dict:
+    sums = _empty_sums()
+    rows = db.query(SessionDB.participants, SessionDB.question_stats, SessionDB.total_questions).filter(
+        SessionDB.quiz_id == quiz_id
+    ).yield_per(200)
+    for participants, question_stats, total_questions in rows:
+        participants = participants or []
+        n_questions = total_questions or 0
+        # Score against the correct options as they were when the session was played
+        correct_options = [[] for _ in range(n_questions)]
+        for stat in question_stats or []:
+            if stat["question_index"] < n_questions:
+                correct_options[stat["question_index"]] = stat.get("correct_answers") or []
+        answered, masks = pack_answers([p.get("answers") or {} for p in participants], n_questions)
+        correct = correct_matrix(answered, masks, correct_options)
+        times = pack_times([p.get("answer_times") or {} for p in participants], n_questions)
+        sums = merge_sums(sums, session_sums(answered, masks, correct, times))
+    return sums
+
+
+def _time_percentiles(histogram: np.ndarray) -> np.ndarray:
+    """Questions x TIME_PERCENTILES matrix of answer times, interpolated within bins; NaN without times."""
+    totals = histogram.sum(axis=1)
+    cumulative = histogram.cumsum(axis=1)
+    targets = totals[:, None] * (np.array(TIME_PERCENTILES) / 100.0)
+    idx = (cumulative[:, None, :] >= targets[:, :, None]).argmax(axis=2)
+    in_bin = np.take_along_axis(histogram, idx, axis=1)
+    before = np.take_along_axis(cumulative, idx, axis=1) - in_bin
+    fraction = np.divide(targets - before, in_bin, out=np.zeros(targets.shape), where=in_bin > 0)
+    values = (idx + fraction) * TIME_BIN_SECONDS
+    values[totals == 0] = np.nan
+    return values
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.full(np.shape(numerator), np.nan), where=denominator > 0)
+
+
+def _rounded(value, digits: int):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def _report(sums: dict, quiz: Quiz) -> list[dict]:
+    attempts = sums["attempts"].astype(np.float64)
+    difficulty = _ratio(sums["correct"], attempts)
+
+    # Point-biserial correlation between getting the question right and the rest score
+    mean_rest = _ratio(sums["rest"], attempts)
+    var_rest = _ratio(sums["rest_sq"], attempts) - mean_rest ** 2
+    covariance = _ratio(sums["rest_correct"], attempts) - difficulty * mean_rest
+    spread = difficulty * (1 - difficulty) * var_rest
+    discrimination = _ratio(covariance, np.sqrt(np.where(spread > 1e-12, spread, 0)))
+
+    counts = sums["option_counts"]
+    selection_rate = _ratio(counts, attempts[:, None])
+    selector_rest = _ratio(sums["option_rest"], counts)
+    correct_rest = _ratio(sums["rest_correct"], sums["correct"])
+    percentiles = _time_percentiles(sums["time_histogram"])
+
+    items = []
+    for q_idx in range(len(attempts)):
+        question = quiz.questions[q_idx] if q_idx < len(quiz.questions) else None
+        correct_options = set(question.correct) if question else set()
+        chosen = np.nonzero(counts[q_idx])[0]
+        n_options = max(len(question.options) if question else 0, int(chosen[-1]) + 1 if len(chosen) else 0)
+
+        options = []
+        for option in range(n_options):
+            selections = int(counts[q_idx, option]) if option < counts.shape[1] else 0
+            rate = selection_rate[q_idx, option] if option < counts.shape[1] else np.nan
+            rest = selector_rest[q_idx, option] if option < counts.shape[1] else np.nan
+            is_correct = option in correct_options
+            options.append({
+                "option": option,
+                "text": question.options[option] if question and option < len(question.options) else None,
+                "is_correct": is_correct,
+                "selections": selections,
+                "selection_rate": _rounded(rate, 3),
+                "mean_rest_score": _rounded(rest, 2),
+                # Picked by a fair share of players, and by weaker ones than those who got it right
+                "effective_distractor": not is_correct and bool(
+                    rate >= MIN_DISTRACTOR_RATE and not (rest >= correct_rest[q_idx])
+                ),
+            })
+
+        flags = []
+        if attempts[q_idx] >= MIN_FLAG_ATTEMPTS:
+            if difficulty[q_idx] > EASY_DIFFICULTY:
+                flags.append("too_easy")
+            elif difficulty[q_idx] < HARD_DIFFICULTY:
+                flags.append("too_hard")
+            if discrimination[q_idx] < LOW_DISCRIMINATION:
+                flags.append("low_discrimination")
+            top_correct = max((o["selections"] for o in options if o["is_correct"]), default=0)
+            if discrimination[q_idx] < 0 or any(
+                not o["is_correct"] and o["selections"] > top_correct for o in options
+            ):
+                flags.append("misleading")
+
+        items.append({
+            "question_index": q_idx,
+            "question_text": question.text if question else None,
+            "attempts": int(attempts[q_idx]),
+            "difficulty": _rounded(difficulty[q_idx], 3),
+            "discrimination": _rounded(discrimination[q_idx], 3),
+            "time_percentiles": None if np.isnan(percentiles[q_idx, 0]) else {
+                f"p{p}": round(float(v), 2) for p, v in zip(TIME_PERCENTILES, percentiles[q_idx])
+            },
+            "options": options,
+            "flags": flags,
+        })
+    return items
+
+
+def get_item_analysis(quiz: Quiz) -> dict:
+    """Difficulty, discrimination, distractor and answer-time analysis for every question.
+
+    Sums are read from the quiz's analytics row; the first call builds them from the
+    stored sessions, after which save_session keeps them up to date. Question text and
+    correct options come from the quiz as it is now.
+    """
+    from session_manager import ensure_quiz_analytics  # session_manager imports this module
+
+    ensure_quiz_analytics(quiz.id)  # So there is always a row to cache the sums in
+    db = SessionLocal()
+    try:
+        analytics = db.query(QuizAnalyticsDB).filter(QuizAnalyticsDB.quiz_id == quiz.id).first()
+        if analytics and analytics.item_stats is None:
+            # Lock so a session saved meanwhile is either in the backfill or folded in after it
+            analytics = db.query(QuizAnalyticsDB).filter(
+                QuizAnalyticsDB.quiz_id == quiz.id
+            ).with_for_update().populate_existing().first()
+        if analytics and analytics.item_stats is not None:
+            sums = sums_from_json(analytics.item_stats)
+        else:
+            sums = _sums_from_sessions(db, quiz.id)
+            if analytics:
+                analytics.item_stats = sums_to_json(sums)
+                db.commit()
+
+        return {"quiz_id": quiz.id, "questions": _report(sums, quiz)}
+    finally:
+        db.close()
@@ -1,33 +1,43 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, status, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, status, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import json
 import uuid
 import os
+import csv
+import asyncio
+import io
 from typing import Optional
 
 from datetime import datetime
 from models import (
     UserCreate, UserLogin, Token, QuizCreate, QuizUpdate, QuestionCreate,
-    QuestionsImport, Quiz, Question, AIGenerateRequest, TemplateCreate,
+    QuestionsImport, Quiz, Question, AIGenerateRequest, TemplateCreate, QuestionBatchEdit,
     TemplateCategory, TemplateRating, TemplateUpdate, GoogleAuthRequest,
-    UserUpdate, PasswordChange, AccountDelete, User, GroupCreate, GroupInvite, Group,
+    UserUpdate, PasswordChange, AccountDelete, User, GroupCreate, GroupInvite, GroupBulkInvite, Group,
     AdminLogin, RoomState
 )
-from auth import create_access_token, get_current_user, decode_token
+from auth import create_access_token, get_current_user, get_optional_user, decode_token, password_pool_stats
 from user_manager import (
     create_user, authenticate_user, get_or_create_google_user, suggest_username,
     update_user_profile, change_user_password, delete_user_account, get_user_by_id
 )
 import httpx
+from google_tokens import verify_google_id_token, close_http_client
 from quiz_manager import (
     create_quiz, get_quiz, get_user_quizzes, add_question,
     import_questions, delete_question, delete_quiz, update_quiz_settings,
-    update_all_questions_settings
+    update_all_questions_settings, clone_quiz, delete_orphan_question_sets,
+    apply_question_edits, QuestionEditError, VersionConflictError
+)
+from ai_service import close_async_client
+from import_manager import iter_ndjson_rows, iter_csv_rows, import_question_rows
+from ai_job_manager import (
+    create_job, get_job, get_job_owner, cancel_job, watch_job, start_workers, stop_workers,
+    JobQueueFullError, TooManyJobsError
 )
-from ai_service import generate_questions
 from room_manager import (
     create_room, get_room, join_room, leave_room, start_quiz as start_room_quiz,
     submit_answer, calculate_scores, next_question, end_quiz,
@@ -37,18 +47,29 @@ from room_manager import (
 from session_manager import (
     save_session, get_session, get_quiz_sessions, get_quiz_analytics, get_user_sessions
 )
+from item_analysis import get_item_analysis
 from template_manager import (
     publish_template, get_template, get_all_templates, get_user_templates,
     increment_uses, rate_template, delete_template, get_featured_templates,
     get_categories_with_counts, verify_template_passcode, update_template,
-    get_template_by_quiz_id, delete_all_templates, get_group_templates
+    get_template_by_quiz_id, delete_all_templates, get_group_templates,
+    invalidate_template_caches, invalidate_quiz_template_details, get_template_with_questions
 )
 from group_manager import (
     create_group as gm_create_group, get_group as gm_get_group,
     get_user_groups, add_member, remove_member as gm_remove_member,
-    delete_group as gm_delete_group, is_group_member, invite_by_username
+    delete_group as gm_delete_group, is_group_member, invite_by_username,
+    get_user_group_ids, invalidate_membership_cache, bulk_invite, MAX_BULK_INVITE
+)
+import response_cache
+import ai_cache
+from usage_counter import run_flush_loop, flush_uses
+from export_manager import (
+    iter_users, iter_quizzes, iter_templates, iter_session_results, encode_rows,
+    USER_FIELDS, QUIZ_FIELDS, TEMPLATE_FIELDS, SESSION_RESULT_FIELDS
 )
-from database import init_db, SessionLocal, UserDB, QuizDB, TemplateDB, SessionDB, GroupDB, GroupMemberDB
+from sqlalchemy import func, select
+from database import init_db, SessionLocal, UserDB, QuizDB, QuestionSetDB, TemplateDB, SessionDB, GroupDB, GroupMemberDB
 
 app = FastAPI(title="Quiz App API")
 
@@ -66,12 +87,35 @@ async def startup_event():
     except Exception as e:
         print(f"WARNING: Database init failed: {e}")
 
+    # Background writer for buffered template uses_count increments
+    app.state.uses_flush_task = asyncio.create_task(run_flush_loop())
+
+    # Worker pool for queued AI generation jobs
+    start_workers()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    import asyncio
+    task = getattr(app.state, "uses_flush_task", None)
+    if task:
+        task.cancel()
+    try:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, flush_uses)
+    except Exception as e:
+        print(f"WARNING: Failed to flush template uses on shutdown: {e}")
+    await close_http_client()
+    await stop_workers()
+    await close_async_client()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count"],
 )
 
 
@@ -114,9 +158,6 @@ manager = ConnectionManager()
 room_start_times: dict[str, datetime] = {}
 
 
-# Google OAuth configuration
-GOOGLE_CLIENT_ID = None  # Set via environment variable in production
-
 # Admin configuration
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 
@@ -147,7 +188,7 @@ async def get_admin_user(credentials: HTTPAuthorizationCredentials = Depends(adm
 # Auth endpoints
 @app.post("/api/auth/register", response_model=Token)
 async def register(user_data: UserCreate):
-    user = create_user(user_data.email, user_data.password, user_data.username)
+    user = await create_user(user_data.email, user_data.password, user_data.username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -170,7 +211,7 @@ async def get_username_suggestion(email: str):
 
 @app.post("/api/auth/login", response_model=Token)
 async def login(user_data: UserLogin):
-    user = authenticate_user(user_data.username, user_data.password)
+    user = await authenticate_user(user_data.username, user_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -185,35 +226,30 @@ async def google_auth(auth_data: GoogleAuthRequest):
     """Authenticate with Google OAuth."""
     try:
         # Verify the Google ID token
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://oauth2.googleapis.com/tokeninfo?id_token={auth_data.credential}"
+        token_info = await verify_google_id_token(auth_data.credential)
+        if token_info is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid Google token"
             )
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid Google token"
-                )
 
-            token_info = response.json()
+        # Extract user info from the token
+        google_id = token_info.get("sub")
+        email = token_info.get("email")
+        name = token_info.get("name", "")
 
-            # Extract user info from the token
-            google_id = token_info.get("sub")
-            email = token_info.get("email")
-            name = token_info.get("name", "")
-
-            if not google_id or not email:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid token data"
-                )
+        if not google_id or not email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid token data"
+            )
 
-            # Get or create user
-            user = get_or_create_google_user(google_id, email, name)
+        # Get or create user
+        user = get_or_create_google_user(google_id, email, name)
 
-            # Create JWT token
-            token = create_access_token({"sub": user.id, "username": user.username})
-            return Token(access_token=token)
+        # Create JWT token
+        token = create_access_token({"sub": user.id, "username": user.username})
+        return Token(access_token=token)
 
     except httpx.RequestError:
         raise HTTPException(
@@ -249,7 +285,7 @@ async def update_profile(user_data: UserUpdate, current_user: dict = Depends(get
 @app.put("/api/users/me/password")
 async def change_password(data: PasswordChange, current_user: dict = Depends(get_current_user)):
     """Change current user's password."""
-    if not change_user_password(current_user["id"], data.current_password, data.new_password):
+    if not await change_user_password(current_user["id"], data.current_password, data.new_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -260,7 +296,7 @@ async def change_password(data: PasswordChange, current_user: dict = Depends(get
 @app.delete("/api/users/me")
 async def delete_account(data: AccountDelete, current_user: dict = Depends(get_current_user)):
     """Delete current user's account."""
-    if not delete_user_account(current_user["id"], data.password):
+    if not await delete_user_account(current_user["id"], data.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password"
@@ -348,12 +384,51 @@ async def import_quiz_questions(
     return {"message": f"{action} {len(questions)} questions", "count": len(questions)}
 
 
-@app.post("/api/quizzes/{quiz_id}/questions/generate")
+@app.post("/api/quizzes/{quiz_id}/questions/import/file")
+async def import_quiz_questions_file(
+    quiz_id: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    replace: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Import questions from an NDJSON or CSV upload, streamed row by row.
+
+    The format defaults to the file extension. Invalid rows are skipped and reported.
+    """
+    quiz = get_quiz(quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.owner_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if format is None:
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        format = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(extension)
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    rows = iter_csv_rows(file.file) if format == "csv" else iter_ndjson_rows(file.file)
+    loop = asyncio.get_event_loop()
+    try:
+        result = await loop.run_in_executor(None, import_question_rows, quiz_id, rows, replace)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    action = "Replaced with" if replace and result["count"] else "Imported"
+    return {"message": f"{action} {result['count']} questions", **result}
+
+
+@app.post("/api/quizzes/{quiz_id}/questions/generate", status_code=202)
 async def generate_quiz_questions(
     quiz_id: str,
     data: AIGenerateRequest,
     current_user: dict = Depends(get_current_user)
 ):
+    """Queue an AI generation job. Questions are added to the quiz as each chunk finishes."""
     quiz = get_quiz(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
@@ -361,18 +436,51 @@ async def generate_quiz_questions(
         raise HTTPException(status_code=403, detail="Not authorized")
 
     try:
-        questions = generate_questions(data.prompt)
-        imported = import_questions(quiz_id, questions, replace=data.replace)
-        action = "Replaced with" if data.replace else "Generated and added"
-        return {
-            "message": f"{action} {len(imported)} questions",
-            "count": len(imported),
-            "questions": [q.model_dump() for q in imported]
-        }
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
+        return create_job(
+            quiz_id, current_user["id"], data.prompt,
+            replace=data.replace, count=data.count, use_cache=not data.fresh
+        )
+    except TooManyJobsError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _require_job_owner(job_id: str, current_user: dict):
+    if get_job_owner(job_id) != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+@app.get("/api/ai-jobs/{job_id}")
+async def get_generation_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get a generation job's status and the questions added so far."""
+    _require_job_owner(job_id, current_user)
+    return get_job(job_id)
+
+
+@app.get("/api/ai-jobs/{job_id}/events")
+async def stream_generation_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Server-sent events for a generation job: a 'status' event on every change and a
+    'questions' event with the questions added since the last event. The stream ends when the job finishes."""
+    _require_job_owner(job_id, current_user)
+
+    async def events():
+        async for snapshot, new_questions in watch_job(job_id):
+            if new_questions:
+                yield f"event: questions\ndata: {json.dumps(new_questions)}\n\n"
+            status_data = {k: v for k, v in snapshot.items() if k != "questions"}
+            yield f"event: status\ndata: {json.dumps(status_data)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.delete("/api/ai-jobs/{job_id}")
+async def cancel_generation_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Cancel a generation job. Questions from chunks that already finished are kept."""
+    _require_job_owner(job_id, current_user)
+    if not await cancel_job(job_id):
+        raise HTTPException(status_code=400, detail="Job has already finished")
+    return {"message": "Job cancelled"}
 
 
 @app.delete("/api/quizzes/{quiz_id}/questions/{question_index}")
@@ -416,6 +524,39 @@ async def bulk_update_questions(
     return {"message": f"Updated {updated_count} questions", "count": updated_count}
 
 
+@app.post("/api/quizzes/{quiz_id}/questions/batch")
+async def batch_edit_questions(
+    quiz_id: str,
+    data: QuestionBatchEdit,
+    current_user: dict = Depends(get_current_user)
+):
+    """Apply ordered insert/update/delete/move operations atomically.
+
+    `version` must match the quiz's current questions version, otherwise 409 is returned
+    and nothing is changed.
+    """
+    quiz = get_quiz(quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.owner_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    try:
+        result = apply_question_edits(quiz_id, data.version, data.operations)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "version": e.current_version})
+    except QuestionEditError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return {
+        "message": f"Applied {len(data.operations)} operations",
+        "version": result["version"],
+        "count": len(result["questions"]),
+        "questions": result["questions"]
+    }
+
+
 # Room endpoints
 @app.post("/api/rooms")
 async def create_new_room(quiz_id: str, current_user: dict = Depends(get_current_user)):
@@ -480,8 +621,47 @@ async def get_quiz_analytics_endpoint(quiz_id: str, current_user: dict = Depends
     if quiz.owner_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    analytics = get_quiz_analytics(quiz_id)
-    return analytics
+    # The first request for a quiz may backfill its totals from every stored session
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, get_quiz_analytics, quiz_id)
+
+
+@app.get("/api/quizzes/{quiz_id}/item-analysis")
+async def get_item_analysis_endpoint(quiz_id: str, current_user: dict = Depends(get_current_user)):
+    """Get per-question difficulty, discrimination, distractor and timing analysis."""
+    quiz = get_quiz(quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.owner_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    # The first request for a quiz reads every stored session
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, get_item_analysis, quiz)
+
+
+def _export_response(rows, fields: list[str], fmt: str, name: str) -> StreamingResponse:
+    """Stream rows as an NDJSON or CSV download."""
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    return StreamingResponse(
+        encode_rows(rows, fields, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+
+@app.get("/api/quizzes/{quiz_id}/sessions/export")
+async def export_quiz_sessions(quiz_id: str, format: str = "csv", current_user: dict = Depends(get_current_user)):
+    """Export per-participant results of every session of a quiz."""
+    quiz = get_quiz(quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.owner_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return _export_response(iter_session_results(quiz_id), SESSION_RESULT_FIELDS, format, f"quiz-{quiz_id}-results")
 
 
 @app.get("/api/sessions/{session_id}")
@@ -497,12 +677,23 @@ async def get_session_details(session_id: str, current_user: dict = Depends(get_
 
 
 # Template Market endpoints
+def _visibility_context(user_id: str | None) -> str:
+    """Cache context for marketplace responses: users only see extra templates through their groups."""
+    if not user_id:
+        return "anon"
+    group_ids = get_user_group_ids(user_id)
+    if not group_ids:
+        return "anon"
+    return "groups:" + ",".join(sorted(group_ids))
+
+
 @app.get("/api/templates")
 async def list_templates(
     request: Request,
     category: Optional[str] = None,
     search: Optional[str] = None,
-    sort_by: str = "uses"
+    sort_by: str = "uses",
+    current_user: Optional[dict] = Depends(get_optional_user)
 ):
     """Get all templates from the marketplace."""
     cat = None
@@ -512,39 +703,40 @@ async def list_templates(
         except ValueError:
             pass
 
-    # Try to get current user for group filtering (optional auth)
-    user_id = None
-    auth_header = request.headers.get("authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ", 1)[1]
-        payload = decode_token(token)
-        if payload:
-            user_id = payload.get("sub")
-
-    templates = get_all_templates(category=cat, search=search, sort_by=sort_by, user_id=user_id)
-    return templates
+    user_id = current_user["id"] if current_user else None
+    context = _visibility_context(user_id)
+    return response_cache.cached_json_response(
+        request,
+        response_cache.make_key(request, context),
+        lambda: get_all_templates(category=cat, search=search, sort_by=sort_by, user_id=user_id),
+        public=context == "anon"
+    )
 
 
 @app.get("/api/templates/featured")
-async def get_featured(request: Request):
+async def get_featured(request: Request, current_user: Optional[dict] = Depends(get_optional_user)):
     """Get featured templates."""
-    # Try to get current user for group filtering (optional auth)
-    user_id = None
-    auth_header = request.headers.get("authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ", 1)[1]
-        payload = decode_token(token)
-        if payload:
-            user_id = payload.get("sub")
-
-    templates = get_featured_templates(user_id=user_id)
-    return templates
+    user_id = current_user["id"] if current_user else None
+    context = _visibility_context(user_id)
+    return response_cache.cached_json_response(
+        request,
+        response_cache.make_key(request, context),
+        lambda: get_featured_templates(user_id=user_id),
+        public=context == "anon"
+    )
 
 
 @app.get("/api/templates/categories")
-async def get_categories():
+async def get_categories(request: Request, current_user: Optional[dict] = Depends(get_optional_user)):
     """Get all categories with template counts."""
-    return get_categories_with_counts()
+    user_id = current_user["id"] if current_user else None
+    context = _visibility_context(user_id)
+    return response_cache.cached_json_response(
+        request,
+        response_cache.make_key(request, context),
+        lambda: get_categories_with_counts(user_id=user_id),
+        public=context == "anon"
+    )
 
 
 @app.get("/api/templates/group/{group_id}")
@@ -563,20 +755,19 @@ async def get_my_templates(current_user: dict = Depends(get_current_user)):
 
 
 @app.get("/api/templates/{template_id}")
-async def get_template_details(template_id: str):
+async def get_template_details(template_id: str, request: Request):
     """Get details of a specific template including questions."""
-    template = get_template(template_id)
-    if not template:
-        raise HTTPException(status_code=404, detail="Template not found")
-
-    # Get the original quiz to include questions
-    original_quiz = get_quiz(template.quiz_id)
-
-    # Return template with questions
-    template_dict = template.model_dump()
-    template_dict["questions"] = [q.model_dump() for q in original_quiz.questions] if original_quiz else []
+    def _load_details():
+        details = get_template_with_questions(template_id)
+        if not details:
+            raise HTTPException(status_code=404, detail="Template not found")
+        return details
 
-    return template_dict
+    # Group and private templates must not be stored by shared caches
+    return response_cache.cached_json_response(
+        request, response_cache.make_key(request), _load_details,
+        public=lambda details: details.get("visibility") == "public"
+    )
 
 
 @app.post("/api/quizzes/{quiz_id}/publish")
@@ -651,39 +842,15 @@ async def use_template(template_id: str, data: TemplateUseRequest = TemplateUseR
         if not verify_template_passcode(template_id, data.passcode):
             raise HTTPException(status_code=403, detail="Incorrect passcode")
 
-    # Get the original quiz
-    original_quiz = get_quiz(template.quiz_id)
-    if not original_quiz:
+    new_quiz = clone_quiz(template.quiz_id, current_user["id"], f"{template.name} (Copy)")
+    if not new_quiz:
         raise HTTPException(status_code=404, detail="Template source quiz not found")
 
-    # Create a new quiz with the same questions
-    new_quiz = create_quiz(
-        name=f"{template.name} (Copy)",
-        owner_id=current_user["id"],
-        hide_results=original_quiz.hide_results
-    )
-
-    # Copy questions
-    from models import QuestionCreate
-    questions_to_import = [
-        QuestionCreate(
-            text=q.text,
-            type=q.type,
-            options=q.options,
-            correct=q.correct,
-            time_limit=q.time_limit,
-            points=q.points
-        )
-        for q in original_quiz.questions
-    ]
-    import_questions(new_quiz.id, questions_to_import)
-
     # Increment uses count
     increment_uses(template_id)
 
-    # Get the updated quiz with questions
-    updated_quiz = get_quiz(new_quiz.id)
-    return updated_quiz
+    # The questions are plain JSON already; skip jsonable_encoder's per-field walk
+    return Response(content=json.dumps(new_quiz, separators=(",", ":")), media_type="application/json")
 
 
 @app.post("/api/templates/{template_id}/rate")
@@ -754,9 +921,14 @@ async def list_user_groups_endpoint(current_user: dict = Depends(get_current_use
 
 
 @app.get("/api/groups/{group_id}")
-async def get_group_endpoint(group_id: str, current_user: dict = Depends(get_current_user)):
-    """Get group details."""
-    group = gm_get_group(group_id)
+async def get_group_endpoint(
+    group_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get group details with one page of members."""
+    group = gm_get_group(group_id, member_offset=offset, member_limit=limit)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     if not is_group_member(group_id, current_user["id"]):
@@ -778,6 +950,50 @@ async def invite_to_group(group_id: str, data: GroupInvite, current_user: dict =
     return result
 
 
+def _bulk_invite_to_group(group_id: str, identifiers: list[str], current_user: dict) -> dict:
+    group = gm_get_group(group_id, member_limit=1)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    if group.owner_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Only the group owner can invite members")
+    if len(identifiers) > MAX_BULK_INVITE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_INVITE} users can be invited at once")
+
+    results = bulk_invite(group_id, identifiers)
+    counts: dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return {
+        "added": counts.get("added", 0),
+        "already_member": counts.get("already_member", 0),
+        "not_found": counts.get("not_found", 0),
+        "duplicate": counts.get("duplicate", 0),
+        "results": results
+    }
+
+
+@app.post("/api/groups/{group_id}/invite/bulk")
+async def bulk_invite_to_group(group_id: str, data: GroupBulkInvite, current_user: dict = Depends(get_current_user)):
+    """Invite many users to a group by username or email. Only the owner can invite."""
+    return _bulk_invite_to_group(group_id, data.usernames, current_user)
+
+
+@app.post("/api/groups/{group_id}/invite/csv")
+async def bulk_invite_csv(group_id: str, file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
+    """Invite users listed in an uploaded CSV (usernames or emails, any column). Only the owner can invite."""
+    content = (await file.read()).decode("utf-8-sig", errors="replace")
+    identifiers = []
+    for row in csv.reader(io.StringIO(content)):
+        for cell in row:
+            cell = cell.strip()
+            # Skip empty cells and a header row
+            if cell and cell.lower() not in ("username", "email", "username_or_email"):
+                identifiers.append(cell)
+    if not identifiers:
+        raise HTTPException(status_code=400, detail="No usernames or emails found in file")
+    return _bulk_invite_to_group(group_id, identifiers, current_user)
+
+
 @app.delete("/api/groups/{group_id}/members/{user_id}")
 async def remove_from_group(group_id: str, user_id: str, current_user: dict = Depends(get_current_user)):
     """Remove a member from a group. Only the owner can remove members."""
@@ -1034,15 +1250,13 @@ async def websocket_endpoint(
                     # Save session if we have a start time
                     session_data = None
                     if room_code in room_start_times and quiz:
+                        # Claimed before awaiting, so the session is saved once
+                        started_at = room_start_times.pop(room_code)
                         try:
-                            saved_session = save_session(
-                                quiz_id=room.quiz_id,
-                                quiz_name=quiz.name,
-                                room_code=room_code,
-                                host_id=room.host_id,
-                                started_at=room_start_times[room_code],
-                                players=room.players,
-                                questions=quiz.questions
+                            # Off the loop: stats for big rooms and the analytics row lock take a while
+                            saved_session = await asyncio.get_event_loop().run_in_executor(
+                                None, save_session, room.quiz_id, quiz.name, room_code, room.host_id,
+                                started_at, dict(room.players), quiz.questions
                             )
                             session_data = {"session_id": saved_session.id}
                             print(f"[DEBUG] Session saved - session_id: {saved_session.id}, quiz_id: {room.quiz_id}")
@@ -1050,8 +1264,6 @@ async def websocket_endpoint(
                             print(f"[DEBUG] ERROR saving session: {e}")
                             import traceback
                             traceback.print_exc()
-                        finally:
-                            del room_start_times[room_code]
                     else:
                         print(f"[DEBUG] Session NOT saved - room_code in room_start_times: {room_code in room_start_times}, quiz: {quiz is not None}")
 
@@ -1089,15 +1301,13 @@ async def websocket_endpoint(
                     # Save session if we have a start time
                     session_data = None
                     if room_code in room_start_times and quiz:
+                        # Claimed before awaiting, so the session is saved once
+                        started_at = room_start_times.pop(room_code)
                         try:
-                            saved_session = save_session(
-                                quiz_id=room.quiz_id,
-                                quiz_name=quiz.name,
-                                room_code=room_code,
-                                host_id=room.host_id,
-                                started_at=room_start_times[room_code],
-                                players=room.players,
-                                questions=quiz.questions
+                            # Off the loop: stats for big rooms and the analytics row lock take a while
+                            saved_session = await asyncio.get_event_loop().run_in_executor(
+                                None, save_session, room.quiz_id, quiz.name, room_code, room.host_id,
+                                started_at, dict(room.players), quiz.questions
                             )
                             session_data = {"session_id": saved_session.id}
                             print(f"[DEBUG] Session saved via end_quiz - session_id: {saved_session.id}")
@@ -1105,8 +1315,6 @@ async def websocket_endpoint(
                             print(f"[DEBUG] ERROR saving session via end_quiz: {e}")
                             import traceback
                             traceback.print_exc()
-                        finally:
-                            del room_start_times[room_code]
                     else:
                         print(f"[DEBUG] Session NOT saved via end_quiz - room_code in room_start_times: {room_code in room_start_times}")
 
@@ -1202,13 +1410,50 @@ async def admin_login(data: AdminLogin):
     return {"access_token": token, "token_type": "bearer"}
 
 
+# Dashboard stats are cached briefly so reloading the dashboard doesn't rerun every count
+ADMIN_STATS_TTL_SECONDS = 15.0
+_admin_stats_snapshot: dict = {"data": None, "stored_at": 0.0}
+
+ADMIN_PAGE_SIZE = 100
+MAX_ADMIN_PAGE_SIZE = 1000
+
+
+def _invalidate_admin_stats():
+    _admin_stats_snapshot["data"] = None
+
+
+def _quiz_counts_subquery():
+    """Quiz count per owner, for joining onto users."""
+    return (
+        select(QuizDB.owner_id, func.count(QuizDB.id).label("quiz_count"))
+        .group_by(QuizDB.owner_id)
+        .subquery()
+    )
+
+
+def _admin_page(query, total: int, sort_columns: dict, sort: str, order: str,
+                offset: int, limit: int, response: Response) -> list:
+    """Apply sorting and pagination to an admin list query. The total is sent as X-Total-Count."""
+    if sort not in sort_columns:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(sort_columns)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    column = sort_columns[sort]
+    query = query.order_by(column.asc() if order == "asc" else column.desc())
+    response.headers["X-Total-Count"] = str(total)
+    return query.offset(max(offset, 0)).limit(max(1, min(limit, MAX_ADMIN_PAGE_SIZE))).all()
+
+
 @app.get("/api/admin/stats")
 async def admin_stats(admin: dict = Depends(get_admin_user)):
     """Get admin dashboard statistics."""
+    import time
+    snapshot = _admin_stats_snapshot["data"]
+    if snapshot is not None and time.monotonic() - _admin_stats_snapshot["stored_at"] <= ADMIN_STATS_TTL_SECONDS:
+        return snapshot
+
     db = SessionLocal()
     try:
-        from sqlalchemy import func
-
         total_users = db.query(func.count(UserDB.id)).scalar() or 0
         total_quizzes = db.query(func.count(QuizDB.id)).scalar() or 0
         total_templates = db.query(func.count(TemplateDB.id)).scalar() or 0
@@ -1216,10 +1461,16 @@ async def admin_stats(admin: dict = Depends(get_admin_user)):
         total_groups = db.query(func.count(GroupDB.id)).scalar() or 0
 
         # Recent users with quiz count
-        recent_users_rows = db.query(UserDB).order_by(UserDB.created_at.desc()).limit(10).all()
+        quiz_counts = _quiz_counts_subquery()
+        recent_users_rows = (
+            db.query(UserDB, func.coalesce(quiz_counts.c.quiz_count, 0))
+            .outerjoin(quiz_counts, quiz_counts.c.owner_id == UserDB.id)
+            .order_by(UserDB.created_at.desc())
+            .limit(10)
+            .all()
+        )
         recent_users = []
-        for u in recent_users_rows:
-            quiz_count = db.query(func.count(QuizDB.id)).filter(QuizDB.owner_id == u.id).scalar() or 0
+        for u, quiz_count in recent_users_rows:
             recent_users.append({
                 "id": u.id,
                 "username": u.username,
@@ -1230,15 +1481,16 @@ async def admin_stats(admin: dict = Depends(get_admin_user)):
 
         # Recent quizzes with owner username and question count
         recent_quizzes_rows = (
-            db.query(QuizDB, UserDB.username)
+            db.query(QuizDB, UserDB.username, QuestionSetDB.questions)
             .join(UserDB, QuizDB.owner_id == UserDB.id)
+            .outerjoin(QuestionSetDB, QuestionSetDB.id == QuizDB.question_set_id)
             .order_by(QuizDB.created_at.desc())
             .limit(10)
             .all()
         )
         recent_quizzes = []
-        for quiz, owner_username in recent_quizzes_rows:
-            question_count = len(quiz.questions) if quiz.questions else 0
+        for quiz, owner_username, shared_questions in recent_quizzes_rows:
+            question_count = len(quiz.questions if quiz.questions is not None else shared_questions or [])
             recent_quizzes.append({
                 "id": quiz.id,
                 "name": quiz.name,
@@ -1260,7 +1512,7 @@ async def admin_stats(admin: dict = Depends(get_admin_user)):
                 "created_at": t.created_at.isoformat() if t.created_at else None,
             })
 
-        return {
+        snapshot = {
             "total_users": total_users,
             "total_quizzes": total_quizzes,
             "total_templates": total_templates,
@@ -1270,34 +1522,89 @@ async def admin_stats(admin: dict = Depends(get_admin_user)):
             "recent_quizzes": recent_quizzes,
             "recent_templates": recent_templates,
         }
+        _admin_stats_snapshot["data"] = snapshot
+        _admin_stats_snapshot["stored_at"] = time.monotonic()
+        return snapshot
     finally:
         db.close()
 
 
+@app.get("/api/admin/cache-stats")
+async def admin_cache_stats(admin: dict = Depends(get_admin_user)):
+    """Get marketplace response cache hit ratio and latency saved."""
+    return response_cache.cache_stats()
+
+
+@app.get("/api/admin/ai-cache-stats")
+async def admin_ai_cache_stats(admin: dict = Depends(get_admin_user)):
+    """Get AI generation cache hits per tier and model time saved."""
+    return ai_cache.cache_stats()
+
+
+@app.get("/api/admin/password-pool-stats")
+async def admin_password_pool_stats(admin: dict = Depends(get_admin_user)):
+    """Get queueing metrics for the password hashing pool."""
+    return password_pool_stats()
+
+
 # Admin Users CRUD
 @app.get("/api/admin/users")
-async def admin_list_users(admin: dict = Depends(get_admin_user)):
-    """List all users."""
+async def admin_list_users(
+    response: Response,
+    offset: int = 0,
+    limit: int = ADMIN_PAGE_SIZE,
+    sort: str = "created_at",
+    order: str = "desc",
+    admin: dict = Depends(get_admin_user)
+):
+    """List users, one page at a time."""
     db = SessionLocal()
     try:
-        from sqlalchemy import func
-
-        users = db.query(UserDB).order_by(UserDB.created_at.desc()).all()
-        result = []
-        for u in users:
-            quiz_count = db.query(func.count(QuizDB.id)).filter(QuizDB.owner_id == u.id).scalar() or 0
-            result.append({
-                "id": u.id,
-                "username": u.username,
-                "email": u.email,
-                "created_at": u.created_at.isoformat() if u.created_at else None,
-                "quiz_count": quiz_count,
-            })
-        return result
+        quiz_counts = _quiz_counts_subquery()
+        quiz_count = func.coalesce(quiz_counts.c.quiz_count, 0)
+        query = (
+            db.query(UserDB.id, UserDB.username, UserDB.email, UserDB.created_at, quiz_count)
+            .outerjoin(quiz_counts, quiz_counts.c.owner_id == UserDB.id)
+        )
+        total = db.query(func.count(UserDB.id)).scalar() or 0
+        rows = _admin_page(query, total, {
+            "created_at": UserDB.created_at,
+            "username": UserDB.username,
+            "email": UserDB.email,
+            "quiz_count": quiz_count,
+        }, sort, order, offset, limit, response)
+        return [
+            {
+                "id": user_id,
+                "username": username,
+                "email": email,
+                "created_at": created_at.isoformat() if created_at else None,
+                "quiz_count": count,
+            }
+            for user_id, username, email, created_at, count in rows
+        ]
     finally:
         db.close()
 
 
+@app.get("/api/admin/export/users")
+async def admin_export_users(format: str = "ndjson", admin: dict = Depends(get_admin_user)):
+    """Export all users as NDJSON or CSV."""
+    return _export_response(iter_users(), USER_FIELDS, format, "users")
+
+
+@app.get("/api/admin/export/quizzes")
+async def admin_export_quizzes(format: str = "ndjson", admin: dict = Depends(get_admin_user)):
+    """Export all quizzes as NDJSON or CSV."""
+    return _export_response(iter_quizzes(), QUIZ_FIELDS, format, "quizzes")
+
+
+@app.get("/api/admin/export/templates")
+async def admin_export_templates(format: str = "ndjson", admin: dict = Depends(get_admin_user)):
+    """Export all templates as NDJSON or CSV."""
+    return _export_response(iter_templates(), TEMPLATE_FIELDS, format, "templates")
+
+
 @app.delete("/api/admin/users/{user_id}")
 async def admin_delete_user(user_id: str, admin: dict = Depends(get_admin_user)):
     """Delete a user and all their data."""
@@ -1308,6 +1615,11 @@ async def admin_delete_user(user_id: str, admin: dict = Depends(get_admin_user))
             raise HTTPException(status_code=404, detail="User not found")
         db.delete(user)
         db.commit()
+        delete_orphan_question_sets()
+        # Groups owned by the user are deleted too, which affects other members
+        invalidate_template_caches()
+        invalidate_membership_cache()
+        _invalidate_admin_stats()
         return {"message": f"User '{user.username}' deleted successfully"}
     finally:
         db.close()
@@ -1315,19 +1627,31 @@ async def admin_delete_user(user_id: str, admin: dict = Depends(get_admin_user))
 
 # Admin Quizzes CRUD
 @app.get("/api/admin/quizzes")
-async def admin_list_quizzes(admin: dict = Depends(get_admin_user)):
-    """List all quizzes."""
+async def admin_list_quizzes(
+    response: Response,
+    offset: int = 0,
+    limit: int = ADMIN_PAGE_SIZE,
+    sort: str = "created_at",
+    order: str = "desc",
+    admin: dict = Depends(get_admin_user)
+):
+    """List quizzes, one page at a time."""
     db = SessionLocal()
     try:
-        rows = (
-            db.query(QuizDB, UserDB.username)
+        query = (
+            db.query(QuizDB, UserDB.username, QuestionSetDB.questions)
             .join(UserDB, QuizDB.owner_id == UserDB.id)
-            .order_by(QuizDB.created_at.desc())
-            .all()
+            .outerjoin(QuestionSetDB, QuestionSetDB.id == QuizDB.question_set_id)
         )
+        total = db.query(func.count(QuizDB.id)).scalar() or 0
+        rows = _admin_page(query, total, {
+            "created_at": QuizDB.created_at,
+            "name": QuizDB.name,
+            "owner_username": UserDB.username,
+        }, sort, order, offset, limit, response)
         result = []
-        for quiz, owner_username in rows:
-            question_count = len(quiz.questions) if quiz.questions else 0
+        for quiz, owner_username, shared_questions in rows:
+            question_count = len(quiz.questions if quiz.questions is not None else shared_questions or [])
             result.append({
                 "id": quiz.id,
                 "name": quiz.name,
@@ -1351,6 +1675,9 @@ async def admin_delete_quiz(quiz_id: str, admin: dict = Depends(get_admin_user))
             raise HTTPException(status_code=404, detail="Quiz not found")
         db.delete(quiz)
         db.commit()
+        delete_orphan_question_sets()
+        invalidate_quiz_template_details(quiz_id)
+        _invalidate_admin_stats()
         return {"message": f"Quiz '{quiz.name}' deleted successfully"}
     finally:
         db.close()
@@ -1358,11 +1685,24 @@ async def admin_delete_quiz(quiz_id: str, admin: dict = Depends(get_admin_user))
 
 # Admin Templates CRUD
 @app.get("/api/admin/templates")
-async def admin_list_templates(admin: dict = Depends(get_admin_user)):
-    """List all templates."""
+async def admin_list_templates(
+    response: Response,
+    offset: int = 0,
+    limit: int = ADMIN_PAGE_SIZE,
+    sort: str = "created_at",
+    order: str = "desc",
+    admin: dict = Depends(get_admin_user)
+):
+    """List templates, one page at a time."""
     db = SessionLocal()
     try:
-        templates = db.query(TemplateDB).order_by(TemplateDB.created_at.desc()).all()
+        total = db.query(func.count(TemplateDB.id)).scalar() or 0
+        templates = _admin_page(db.query(TemplateDB), total, {
+            "created_at": TemplateDB.created_at,
+            "name": TemplateDB.name,
+            "uses_count": TemplateDB.uses_count,
+            "rating": TemplateDB.rating,
+        }, sort, order, offset, limit, response)
         result = []
         for t in templates:
             result.append({
@@ -1390,6 +1730,8 @@ async def admin_delete_template(template_id: str, admin: dict = Depends(get_admi
             raise HTTPException(status_code=404, detail="Template not found")
         db.delete(template)
         db.commit()
+        invalidate_template_caches()
+        _invalidate_admin_stats()
         return {"message": f"Template '{template.name}' deleted successfully"}
     finally:
         db.close()
@@ -1397,23 +1739,41 @@ async def admin_delete_template(template_id: str, admin: dict = Depends(get_admi
 
 # Admin Groups CRUD
 @app.get("/api/admin/groups")
-async def admin_list_groups(admin: dict = Depends(get_admin_user)):
-    """List all groups."""
+async def admin_list_groups(
+    response: Response,
+    offset: int = 0,
+    limit: int = ADMIN_PAGE_SIZE,
+    sort: str = "created_at",
+    order: str = "desc",
+    admin: dict = Depends(get_admin_user)
+):
+    """List groups, one page at a time."""
     db = SessionLocal()
     try:
-        from sqlalchemy import func
-
-        groups = db.query(GroupDB).order_by(GroupDB.created_at.desc()).all()
+        member_counts = (
+            select(GroupMemberDB.group_id, func.count(GroupMemberDB.id).label("member_count"))
+            .group_by(GroupMemberDB.group_id)
+            .subquery()
+        )
+        member_count = func.coalesce(member_counts.c.member_count, 0)
+        query = (
+            db.query(GroupDB, UserDB.username, member_count)
+            .outerjoin(UserDB, UserDB.id == GroupDB.owner_id)
+            .outerjoin(member_counts, member_counts.c.group_id == GroupDB.id)
+        )
+        total = db.query(func.count(GroupDB.id)).scalar() or 0
+        rows = _admin_page(query, total, {
+            "created_at": GroupDB.created_at,
+            "name": GroupDB.name,
+            "member_count": member_count,
+        }, sort, order, offset, limit, response)
         result = []
-        for g in groups:
-            owner = db.query(UserDB).filter(UserDB.id == g.owner_id).first()
-            owner_username = owner.username if owner else "unknown"
-            member_count = db.query(func.count(GroupMemberDB.id)).filter(GroupMemberDB.group_id == g.id).scalar() or 0
+        for g, owner_username, count in rows:
             result.append({
                 "id": g.id,
                 "name": g.name,
-                "owner_username": owner_username,
-                "member_count": member_count,
+                "owner_username": owner_username or "unknown",
+                "member_count": count,
                 "created_at": g.created_at.isoformat() if g.created_at else None,
             })
         return result
@@ -1429,8 +1789,11 @@ async def admin_delete_group(group_id: str, admin: dict = Depends(get_admin_user
         group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
+        member_ids = [m.user_id for m in group.members]
         db.delete(group)
         db.commit()
+        invalidate_membership_cache(member_ids)
+        _invalidate_admin_stats()
         return {"message": f"Group '{group.name}' deleted successfully"}
     finally:
         db.close()
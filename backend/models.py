@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from enum import Enum
 
 
@@ -37,9 +37,33 @@ class QuestionsImport(BaseModel):
     replace: bool = False  # If true, delete existing questions before importing
 
 
+class QuestionFields(BaseModel):
+    text: Optional[str] = None
+    type: Optional[QuestionType] = None
+    options: Optional[list[str]] = None
+    correct: Optional[list[int]] = None
+    time_limit: Optional[int] = None
+    points: Optional[int] = None
+
+
+class QuestionOperation(BaseModel):
+    op: Literal["insert", "update", "delete", "move"]
+    index: Optional[int] = None  # Position in the list as left by earlier operations (insert defaults to the end)
+    to: Optional[int] = None  # Destination position for "move"
+    question: Optional[QuestionCreate] = None  # For "insert"
+    fields: Optional[QuestionFields] = None  # For "update"; only the fields given are changed
+
+
+class QuestionBatchEdit(BaseModel):
+    version: int  # Questions version the edits were made against
+    operations: list[QuestionOperation] = Field(..., min_length=1, max_length=1000)
+
+
 class AIGenerateRequest(BaseModel):
     prompt: str = Field(..., min_length=10, max_length=500)
     replace: bool = False  # If true, delete existing questions before generating
+    count: Optional[int] = Field(None, ge=1, le=100)  # Defaults to the number named in the prompt
+    fresh: bool = False  # If true, skip the prompt cache and call the model
 
 
 class Quiz(BaseModel):
@@ -49,6 +73,7 @@ class Quiz(BaseModel):
     questions: list[Question] = []
     hide_results: bool = False  # Hide results from quiz takers
     fun_mode: bool = False  # Enable chaotic fun effects during quiz
+    version: int = 0  # Questions version, sent back with batch edits
 
 
 class QuizCreate(BaseModel):
@@ -108,6 +133,7 @@ class Player(BaseModel):
     answers: dict[int, list[int]] = {}  # question_index -> selected options
     answer_times: dict[int, float] = {}  # question_index -> time taken in seconds
     tab_switches: int = 0  # cheat detection: number of times user switched tabs
+    tab_switch_times: dict[int, list[float]] = {}  # question_index -> seconds into the question of each switch
     correct_answers: int = 0  # number of questions answered correctly
     disconnected_at: Optional[float] = None  # timestamp when disconnected
 
@@ -175,6 +201,7 @@ class PlayerResult(BaseModel):
     wrong_answers: int
     tab_switches: int
     answers: dict[int, list[int]] = {}  # question_index -> selected options
+    answer_times: dict[int, float] = {}  # question_index -> time taken in seconds
 
 
 class QuizSession(BaseModel):
@@ -188,6 +215,7 @@ class QuizSession(BaseModel):
     total_questions: int
     participants: list[PlayerResult]
     question_stats: list[dict] = []  # Per-question statistics
+    anomalies: list[dict] = []  # Per-player cheat-detection scores
 
 
 class QuestionStat(BaseModel):
@@ -277,5 +305,9 @@ class GroupInvite(BaseModel):
     username: str
 
 
+class GroupBulkInvite(BaseModel):
+    usernames: list[str]  # Usernames or emails
+
+
 class AdminLogin(BaseModel):
     password: str
@@ -1,7 +1,10 @@
 import uuid
+from datetime import datetime
 from typing import Optional
-from models import Quiz, Question, QuestionCreate, QuestionType
-from database import SessionLocal, QuizDB
+from sqlalchemy import exists, func, insert, literal, null, select, update
+from models import Quiz, Question, QuestionCreate, QuestionType, QuestionOperation
+from database import SessionLocal, QuizDB, QuestionSetDB
+from template_manager import invalidate_quiz_template_details
 
 
 def create_quiz(name: str, owner_id: str, hide_results: bool = False, fun_mode: bool = False) -> Quiz:
@@ -18,7 +21,127 @@ def create_quiz(name: str, owner_id: str, hide_results: bool = False, fun_mode:
         )
         db.add(db_quiz)
         db.commit()
-        return Quiz(id=quiz_id, name=name, owner_id=owner_id, questions=[], hide_results=hide_results, fun_mode=fun_mode)
+        return Quiz(id=quiz_id, name=name, owner_id=owner_id, questions=[], hide_results=hide_results, fun_mode=fun_mode, version=0)
+    finally:
+        db.close()
+
+
+# Quizzes created from a template share the source's immutable question set
+# (questions is NULL, question_set_id set) until they are first edited.
+
+def _shared_questions(db, question_set_id: str) -> list:
+    return db.query(QuestionSetDB.questions).filter(QuestionSetDB.id == question_set_id).scalar() or []
+
+
+def quiz_questions(db, quiz: QuizDB) -> list:
+    """A quiz's questions: its own copy, or the question set it shares."""
+    if quiz.questions is not None:
+        return quiz.questions
+    if quiz.question_set_id:
+        return _shared_questions(db, quiz.question_set_id)
+    return []
+
+
+def _release_question_set(db, question_set_id: str):
+    """Delete a question set once no quiz references it."""
+    db.flush()
+    db.query(QuestionSetDB).filter(
+        QuestionSetDB.id == question_set_id,
+        ~exists().where(QuizDB.question_set_id == question_set_id)
+    ).delete(synchronize_session=False)
+
+
+def replace_quiz_questions(db, quiz: QuizDB, questions: list):
+    """Give a quiz its own question list, detaching it from any shared set."""
+    question_set_id = quiz.question_set_id
+    quiz.questions = questions
+    quiz.question_set_id = None
+    if question_set_id:
+        _release_question_set(db, question_set_id)
+
+
+def bump_questions_version(quiz: QuizDB):
+    """Record a change to a quiz's questions, invalidating batch edits made against the old version."""
+    quiz.questions_version = func.coalesce(QuizDB.questions_version, 0) + 1
+
+
+def own_quiz_questions(db, quiz: QuizDB) -> list:
+    """Copy-on-write: materialize a shared question set into the quiz before editing it."""
+    if quiz.questions is None:
+        replace_quiz_questions(db, quiz, list(quiz_questions(db, quiz)))
+    return quiz.questions
+
+
+def delete_orphan_question_sets():
+    """Delete question sets no quiz references any more, e.g. after cascading user deletes."""
+    db = SessionLocal()
+    try:
+        db.query(QuestionSetDB).filter(
+            ~exists().where(QuizDB.question_set_id == QuestionSetDB.id)
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def clone_quiz(source_quiz_id: str, owner_id: str, name: str) -> Optional[dict]:
+    """Create a quiz that shares the source quiz's questions instead of copying them.
+
+    The first clone moves the source's questions into an immutable question set that the
+    source and every clone then reference; later clones only insert a row. Returns the new
+    quiz as a plain dict, or None if the source quiz does not exist.
+    """
+    db = SessionLocal()
+    try:
+        source = (
+            db.query(QuizDB.question_set_id, QuizDB.questions.is_(None), QuizDB.hide_results)
+            .filter(QuizDB.id == source_quiz_id)
+            .with_for_update()
+            .first()
+        )
+        if source is None:
+            return None
+        question_set_id, shared, hide_results = source
+
+        if not shared:
+            # Snapshot the source's own questions inside the database, then let it share them too
+            question_set_id = str(uuid.uuid4())
+            db.execute(
+                insert(QuestionSetDB).from_select(
+                    ["id", "questions", "created_at"],
+                    select(literal(question_set_id), QuizDB.questions, literal(datetime.utcnow()))
+                    .where(QuizDB.id == source_quiz_id)
+                )
+            )
+            db.execute(
+                update(QuizDB)
+                .where(QuizDB.id == source_quiz_id)
+                .values(questions=null(), question_set_id=question_set_id)
+            )
+
+        quiz_id = str(uuid.uuid4())
+        # Core insert: the ORM would replace questions=None with the column default
+        db.execute(insert(QuizDB).values(
+            id=quiz_id,
+            name=name,
+            owner_id=owner_id,
+            questions=null(),
+            question_set_id=question_set_id,
+            hide_results=hide_results,
+            fun_mode=False,
+            questions_version=0,
+            created_at=datetime.utcnow()
+        ))
+        db.commit()
+        return {
+            "id": quiz_id,
+            "name": name,
+            "owner_id": owner_id,
+            "questions": _shared_questions(db, question_set_id),
+            "hide_results": bool(hide_results),
+            "fun_mode": False,
+            "version": 0
+        }
     finally:
         db.close()
 
@@ -35,14 +158,15 @@ def update_quiz_settings(quiz_id: str, hide_results: bool = None, fun_mode: bool
             quiz.fun_mode = fun_mode
         db.commit()
 
-        questions = [Question(**q) for q in (quiz.questions or [])]
+        questions = [Question(**q) for q in quiz_questions(db, quiz)]
         return Quiz(
             id=quiz.id,
             name=quiz.name,
             owner_id=quiz.owner_id,
             questions=questions,
             hide_results=quiz.hide_results,
-            fun_mode=quiz.fun_mode
+            fun_mode=quiz.fun_mode,
+            version=quiz.questions_version or 0
         )
     finally:
         db.close()
@@ -54,14 +178,15 @@ def get_quiz(quiz_id: str) -> Optional[Quiz]:
         quiz = db.query(QuizDB).filter(QuizDB.id == quiz_id).first()
         if not quiz:
             return None
-        questions = [Question(**q) for q in (quiz.questions or [])]
+        questions = [Question(**q) for q in quiz_questions(db, quiz)]
         return Quiz(
             id=quiz.id,
             name=quiz.name,
             owner_id=quiz.owner_id,
             questions=questions,
             hide_results=quiz.hide_results,
-            fun_mode=quiz.fun_mode
+            fun_mode=quiz.fun_mode,
+            version=quiz.questions_version or 0
         )
     finally:
         db.close()
@@ -71,16 +196,23 @@ def get_user_quizzes(user_id: str) -> list[Quiz]:
     db = SessionLocal()
     try:
         quizzes = db.query(QuizDB).filter(QuizDB.owner_id == user_id).all()
+        # Load every shared question set in one query
+        set_ids = {quiz.question_set_id for quiz in quizzes if quiz.questions is None and quiz.question_set_id}
+        shared = dict(
+            db.query(QuestionSetDB.id, QuestionSetDB.questions).filter(QuestionSetDB.id.in_(set_ids)).all()
+        ) if set_ids else {}
         result = []
         for quiz in quizzes:
-            questions = [Question(**q) for q in (quiz.questions or [])]
+            own = quiz.questions if quiz.questions is not None else shared.get(quiz.question_set_id)
+            questions = [Question(**q) for q in (own or [])]
             result.append(Quiz(
                 id=quiz.id,
                 name=quiz.name,
                 owner_id=quiz.owner_id,
                 questions=questions,
                 hide_results=quiz.hide_results,
-                fun_mode=quiz.fun_mode
+                fun_mode=quiz.fun_mode,
+                version=quiz.questions_version or 0
             ))
         return result
     finally:
@@ -103,10 +235,12 @@ def add_question(quiz_id: str, question_data: QuestionCreate) -> Optional[Questi
             points=question_data.points
         )
 
-        questions = quiz.questions or []
+        questions = own_quiz_questions(db, quiz)
         questions.append(question.model_dump())
         quiz.questions = questions
+        bump_questions_version(quiz)
         db.commit()
+        invalidate_quiz_template_details(quiz_id)
 
         return question
     finally:
@@ -120,8 +254,10 @@ def clear_questions(quiz_id: str) -> bool:
         quiz = db.query(QuizDB).filter(QuizDB.id == quiz_id).first()
         if not quiz:
             return False
-        quiz.questions = []
+        replace_quiz_questions(db, quiz, [])
+        bump_questions_version(quiz)
         db.commit()
+        invalidate_quiz_template_details(quiz_id)
         return True
     finally:
         db.close()
@@ -136,9 +272,9 @@ def import_questions(quiz_id: str, questions: list[QuestionCreate], replace: boo
 
         # Clear existing questions if replace is True
         if replace:
-            quiz.questions = []
+            replace_quiz_questions(db, quiz, [])
 
-        existing_questions = quiz.questions or []
+        existing_questions = own_quiz_questions(db, quiz)
         added_questions = []
 
         for q_data in questions:
@@ -154,7 +290,9 @@ def import_questions(quiz_id: str, questions: list[QuestionCreate], replace: boo
             added_questions.append(question)
 
         quiz.questions = existing_questions
+        bump_questions_version(quiz)
         db.commit()
+        invalidate_quiz_template_details(quiz_id)
 
         return added_questions
     finally:
@@ -168,13 +306,15 @@ def delete_question(quiz_id: str, question_index: int) -> bool:
         if not quiz:
             return False
 
-        questions = quiz.questions or []
+        questions = own_quiz_questions(db, quiz)
         if question_index < 0 or question_index >= len(questions):
             return False
 
         questions.pop(question_index)
         quiz.questions = questions
+        bump_questions_version(quiz)
         db.commit()
+        invalidate_quiz_template_details(quiz_id)
         return True
     finally:
         db.close()
@@ -186,8 +326,12 @@ def delete_quiz(quiz_id: str) -> bool:
         quiz = db.query(QuizDB).filter(QuizDB.id == quiz_id).first()
         if not quiz:
             return False
+        question_set_id = quiz.question_set_id
         db.delete(quiz)
+        if question_set_id:
+            _release_question_set(db, question_set_id)
         db.commit()
+        invalidate_quiz_template_details(quiz_id)
         return True
     finally:
         db.close()
@@ -201,7 +345,7 @@ def update_all_questions_settings(quiz_id: str, time_limit: int = None, points:
         if not quiz:
             return 0
 
-        questions = quiz.questions or []
+        questions = quiz_questions(db, quiz)
         if not questions:
             return 0
 
@@ -215,8 +359,103 @@ def update_all_questions_settings(quiz_id: str, time_limit: int = None, points:
                 updated_q['points'] = points
             updated_questions.append(updated_q)
 
-        quiz.questions = updated_questions  # Assign new list to trigger change detection
+        replace_quiz_questions(db, quiz, updated_questions)  # Assign new list to trigger change detection
+        bump_questions_version(quiz)
         db.commit()
+        invalidate_quiz_template_details(quiz_id)
         return len(updated_questions)
     finally:
         db.close()
+
+
+class QuestionEditError(ValueError):
+    """Raised when an operation in a batch edit cannot be applied."""
+
+
+class VersionConflictError(Exception):
+    """Raised when a batch edit was made against an outdated questions version."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Questions were changed by someone else (current version {current_version})")
+        self.current_version = current_version
+
+
+def _check_question(question: dict):
+    if len(question["options"]) < 2:
+        raise ValueError("at least 2 options are required")
+    if not question["correct"] or any(c < 0 or c >= len(question["options"]) for c in question["correct"]):
+        raise ValueError("correct index out of range")
+
+
+def _apply_operation(questions: list[dict], operation: QuestionOperation):
+    if operation.op == "insert":
+        if operation.question is None:
+            raise ValueError("insert requires a question")
+        index = len(questions) if operation.index is None else operation.index
+        if not 0 <= index <= len(questions):
+            raise ValueError(f"index {index} out of range")
+        question = Question(**operation.question.model_dump()).model_dump()
+        _check_question(question)
+        questions.insert(index, question)
+        return
+
+    index = operation.index
+    if index is None or not 0 <= index < len(questions):
+        raise ValueError(f"index {index} out of range")
+    if operation.op == "delete":
+        questions.pop(index)
+    elif operation.op == "move":
+        if operation.to is None or not 0 <= operation.to < len(questions):
+            raise ValueError(f"destination {operation.to} out of range")
+        questions.insert(operation.to, questions.pop(index))
+    elif operation.op == "update":
+        if operation.fields is None:
+            raise ValueError("update requires fields")
+        changes = operation.fields.model_dump(exclude_none=True)
+        question = Question(**{**questions[index], **changes}).model_dump()
+        _check_question(question)
+        questions[index] = question
+
+
+def apply_question_edits(quiz_id: str, expected_version: int, operations: list[QuestionOperation]) -> Optional[dict]:
+    """Apply an ordered list of insert/update/delete/move operations as one write.
+
+    Operations run in memory against the version the client last saw; the new list is
+    saved with a single conditional UPDATE, so either every operation lands or none does.
+    Raises VersionConflictError if the questions changed since expected_version and
+    QuestionEditError for an invalid operation. Returns None if the quiz does not exist.
+    """
+    db = SessionLocal()
+    try:
+        quiz = db.query(QuizDB).filter(QuizDB.id == quiz_id).first()
+        if not quiz:
+            return None
+        if (quiz.questions_version or 0) != expected_version:
+            raise VersionConflictError(quiz.questions_version or 0)
+
+        questions = [dict(q) for q in quiz_questions(db, quiz)]
+        for position, operation in enumerate(operations):
+            try:
+                _apply_operation(questions, operation)
+            except (ValueError, TypeError) as e:
+                raise QuestionEditError(f"Operation {position} ({operation.op}): {e}")
+
+        shared_set_id = quiz.question_set_id
+        new_version = expected_version + 1
+        result = db.execute(
+            update(QuizDB)
+            .where(QuizDB.id == quiz_id, func.coalesce(QuizDB.questions_version, 0) == expected_version)
+            .values(questions=questions, question_set_id=None, questions_version=new_version)
+        )
+        if result.rowcount == 0:
+            # Another write landed between our read and this update
+            db.rollback()
+            current = db.query(QuizDB.questions_version).filter(QuizDB.id == quiz_id).scalar()
+            raise VersionConflictError(current or 0)
+        if shared_set_id:
+            _release_question_set(db, shared_set_id)
+        db.commit()
+        invalidate_quiz_template_details(quiz_id)
+        return {"version": new_version, "questions": questions}
+    finally:
+        db.close()
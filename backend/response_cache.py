@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Cached JSON responses for read-heavy public endpoints: key -> entry
+_entries: OrderedDict[str, dict] = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "saved_ms": 0.0}
+_generation = 0  # Bumped on clear() so responses computed before an invalidation are not stored
+
+MAX_ENTRIES = 1024
+TTL_SECONDS = 60.0
+
+
+def make_key(request: Request, context: str = "anon") -> str:
+    """Build a cache key from the path, the normalized query string and the visibility context."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}|{context}"
+
+
+def clear():
+    """Drop all cached responses."""
+    global _generation
+    with _lock:
+        _entries.clear()
+        _generation += 1
+
+
+def discard_path(path: str):
+    """Drop cached responses for a single path, across all query strings and contexts."""
+    global _generation
+    prefix = path + "?"
+    with _lock:
+        for key in [k for k in _entries if k.startswith(prefix)]:
+            del _entries[key]
+        _generation += 1
+
+
+def cache_stats() -> dict:
+    """Get hit/miss counters and the handler time saved by cache hits."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "entries": len(_entries),
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "not_modified": _stats["not_modified"],
+            "hit_ratio": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+            "latency_saved_ms": round(_stats["saved_ms"], 1),
+        }
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_json_response(request: Request, key: str, compute, public=True) -> Response:
+    """Serve a JSON payload from the cache, computing and storing it on a miss.
+
+    Emits ETag and Cache-Control headers and answers a matching If-None-Match with 304.
+    public is a bool, or a function of the payload when only the payload tells whether
+    shared caches may store it.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry and now - entry["stored_at"] > TTL_SECONDS:
+            del _entries[key]
+            entry = None
+        if entry:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            _stats["saved_ms"] += entry["compute_ms"]
+        generation = _generation
+
+    if entry is None:
+        start = time.perf_counter()
+        payload = compute()
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+        entry = {
+            "body": body,
+            "etag": '"' + hashlib.sha1(body).hexdigest() + '"',
+            "compute_ms": (time.perf_counter() - start) * 1000,
+            "stored_at": now,
+            "public": public(payload) if callable(public) else public,
+        }
+        with _lock:
+            _stats["misses"] += 1
+            if generation == _generation:
+                _entries[key] = entry
+                while len(_entries) > MAX_ENTRIES:
+                    _entries.popitem(last=False)
+
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": ("public" if entry["public"] else "private") + ", max-age=0, must-revalidate",
+    }
+    if _etag_matches(request, entry["etag"]):
+        with _lock:
+            _stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
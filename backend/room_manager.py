@@ -282,5 +282,9 @@ def record_tab_switch(room_code: str, user_id: str) -> bool:
     if user_id not in room.players:
         return False
 
-    room.players[user_id].tab_switches += 1
+    player = room.players[user_id]
+    player.tab_switches += 1
+    # Timed like answers, so switches can be matched to the answer that followed
+    if room.question_start_time > 0:
+        player.tab_switch_times.setdefault(room.current_question, []).append(time.time() - room.question_start_time)
     return True
@@ -1,7 +1,100 @@
 from datetime import datetime
 import uuid
-from models import QuizSession, PlayerResult, QuestionStat
-from database import SessionLocal, SessionDB
+from sqlalchemy.exc import IntegrityError
+from models import QuizSession, PlayerResult
+from database import SessionLocal, SessionDB, QuizAnalyticsDB
+from session_stats import pack_answers, pack_times, correct_matrix, build_question_stats
+import item_analysis
+from anomaly_detection import score_session
+
+RECENT_SESSIONS = 10  # Sessions included in a quiz's analytics
+
+
+def _to_quiz_session(session: SessionDB) -> QuizSession:
+    participants = [PlayerResult(**p) for p in (session.participants or [])]
+    return QuizSession(
+        id=session.id,
+        quiz_id=session.quiz_id,
+        quiz_name=session.quiz_name,
+        room_code=session.room_code,
+        host_id=session.host_id,
+        started_at=session.started_at.isoformat(),
+        ended_at=session.ended_at.isoformat(),
+        total_questions=session.total_questions,
+        participants=participants,
+        question_stats=session.question_stats or [],
+        anomalies=session.anomalies or []
+    )
+
+
+def _add_to_analytics(analytics: QuizAnalyticsDB, participants: list[dict], question_stats: list[dict], total_questions: int):
+    """Fold one session's results into a quiz's running totals."""
+    analytics.total_sessions += 1
+    for participant in participants:
+        analytics.total_participants += 1
+        analytics.total_score += participant.get("score", 0)
+        analytics.total_correct += participant.get("correct_answers", 0)
+        analytics.total_questions_answered += total_questions
+
+    # Assign a new list so the JSON column is marked as changed
+    per_question = [dict(stat) for stat in (analytics.question_stats or [])]
+    for stat in question_stats:
+        q_idx = stat["question_index"]
+        while len(per_question) <= q_idx:
+            per_question.append({"attempts": 0, "correct": 0})
+        per_question[q_idx]["attempts"] += stat.get("total_attempts", 0)
+        per_question[q_idx]["correct"] += stat.get("correct_attempts", 0)
+    analytics.question_stats = per_question
+    analytics.updated_at = datetime.utcnow()
+
+
+def _locked_analytics(db, quiz_id: str, backfill_before: datetime) -> QuizAnalyticsDB:
+    """Lock a quiz's analytics row, creating an empty one if it is missing.
+
+    A new row only covers sessions that end from backfill_before on; ensure_quiz_analytics
+    adds the older ones.
+    """
+    query = db.query(QuizAnalyticsDB).filter(QuizAnalyticsDB.quiz_id == quiz_id).with_for_update()
+    analytics = query.first()
+    if analytics is None:
+        try:
+            with db.begin_nested():
+                analytics = QuizAnalyticsDB(
+                    quiz_id=quiz_id, total_sessions=0, total_participants=0, total_score=0,
+                    total_correct=0, total_questions_answered=0, question_stats=[],
+                    backfill_before=backfill_before
+                )
+                db.add(analytics)
+        except IntegrityError:
+            analytics = query.populate_existing().first()  # Created concurrently
+    return analytics
+
+
+def ensure_quiz_analytics(quiz_id: str):
+    """Make sure a quiz's analytics row exists and covers every stored session.
+
+    The first call for a quiz with older sessions reads all of them, so call this off
+    the event loop.
+    """
+    db = SessionLocal()
+    try:
+        pending = db.query(QuizAnalyticsDB.backfill_before).filter(QuizAnalyticsDB.quiz_id == quiz_id).first()
+        if pending is not None and pending.backfill_before is None:
+            return
+
+        # Saves of this quiz wait on the row lock, so none is missed or counted twice
+        analytics = _locked_analytics(db, quiz_id, datetime.utcnow())
+        if analytics.backfill_before is not None:
+            # Only the columns the totals need, streamed rather than loaded at once
+            rows = db.query(SessionDB.participants, SessionDB.question_stats, SessionDB.total_questions).filter(
+                SessionDB.quiz_id == quiz_id, SessionDB.ended_at < analytics.backfill_before
+            ).yield_per(500)
+            for participants, question_stats, total_questions in rows:
+                _add_to_analytics(analytics, participants or [], question_stats or [], total_questions or 0)
+            analytics.backfill_before = None
+        db.commit()
+    finally:
+        db.close()
 
 
 def save_session(
@@ -13,65 +106,43 @@ def save_session(
     players: dict,
     questions: list
 ) -> QuizSession:
-    """Save a completed quiz session with all player results and statistics."""
+    """Save a completed quiz session with all player results and statistics.
+
+    The quiz's analytics totals are updated in the same transaction.
+    """
     db = SessionLocal()
     try:
         session_id = str(uuid.uuid4())
         ended_at = datetime.utcnow()
 
-        # Convert players to PlayerResult objects
-        participants = []
-        for player_id, player in players.items():
-            total_questions = len(questions)
-            correct = player.correct_answers
-            wrong = total_questions - correct
-
-            participant = PlayerResult(
-                user_id=player_id,
-                username=player.username,
-                score=player.score,
-                correct_answers=correct,
-                wrong_answers=wrong,
-                tab_switches=player.tab_switches,
-                answers=player.answers
-            )
-            participants.append(participant)
-
-        # Calculate question statistics
-        question_stats = []
-        for q_idx, question in enumerate(questions):
-            answer_distribution: dict[int, int] = {}
-            correct_attempts = 0
-            total_attempts = 0
-
-            for player in players.values():
-                if q_idx in player.answers:
-                    total_attempts += 1
-                    player_answers = player.answers[q_idx]
-
-                    # Track answer distribution
-                    for ans in player_answers:
-                        answer_distribution[ans] = answer_distribution.get(ans, 0) + 1
-
-                    # Check if correct
-                    if sorted(player_answers) == sorted(question.correct):
-                        correct_attempts += 1
-
-            accuracy = (correct_attempts / total_attempts * 100) if total_attempts > 0 else 0
-
-            stat = QuestionStat(
-                question_index=q_idx,
-                question_text=question.text,
-                correct_answers=question.correct,
-                total_attempts=total_attempts,
-                correct_attempts=correct_attempts,
-                accuracy_percentage=round(accuracy, 1),
-                answer_distribution=answer_distribution
-            )
-            question_stats.append(stat.model_dump())
+        # Participant results; validated once when the QuizSession is built
+        total_questions = len(questions)
+        participants = [
+            {
+                "user_id": player_id,
+                "username": player.username,
+                "score": player.score,
+                "correct_answers": player.correct_answers,
+                "wrong_answers": total_questions - player.correct_answers,
+                "tab_switches": player.tab_switches,
+                "answers": player.answers,
+                "answer_times": player.answer_times,
+            }
+            for player_id, player in players.items()
+        ]
+
+        # Question statistics over a players x questions matrix of answer bitmasks
+        answered, masks = pack_answers([player.answers for player in players.values()], total_questions)
+        correct = correct_matrix(answered, masks, [question.correct for question in questions])
+        question_stats = build_question_stats(questions, answered, masks, correct)
+        times = pack_times([player.answer_times for player in players.values()], total_questions)
+        anomalies = score_session(
+            list(players), answered, correct, times,
+            [player.tab_switch_times for player in players.values()]
+        )
 
         # Sort participants by score
-        participants.sort(key=lambda p: p.score, reverse=True)
+        participants.sort(key=lambda p: p["score"], reverse=True)
 
         # Save to database
         db_session = SessionDB(
@@ -83,10 +154,18 @@ def save_session(
             started_at=started_at,
             ended_at=ended_at,
             total_questions=len(questions),
-            participants=[p.model_dump() for p in participants],
-            question_stats=question_stats
+            participants=participants,
+            question_stats=question_stats,
+            anomalies=anomalies
         )
         db.add(db_session)
+
+        # Fold into the running totals; sessions older than a pending backfill are left to it
+        analytics = _locked_analytics(db, quiz_id, ended_at)
+        if analytics.backfill_before is None or ended_at >= analytics.backfill_before:
+            _add_to_analytics(analytics, participants, question_stats, total_questions)
+        if analytics.item_stats is not None:
+            analytics.item_stats = item_analysis.add_session(analytics.item_stats, answered, masks, correct, times)
         db.commit()
 
         session = QuizSession(
@@ -99,7 +178,8 @@ def save_session(
             ended_at=ended_at.isoformat(),
             total_questions=len(questions),
             participants=participants,
-            question_stats=question_stats
+            question_stats=question_stats,
+            anomalies=anomalies
         )
 
         print(f"[DEBUG session_manager] Session saved - id: {session_id}, quiz_id: {quiz_id}")
@@ -116,19 +196,7 @@ def get_session(session_id: str) -> QuizSession | None:
         if not session:
             return None
 
-        participants = [PlayerResult(**p) for p in (session.participants or [])]
-        return QuizSession(
-            id=session.id,
-            quiz_id=session.quiz_id,
-            quiz_name=session.quiz_name,
-            room_code=session.room_code,
-            host_id=session.host_id,
-            started_at=session.started_at.isoformat(),
-            ended_at=session.ended_at.isoformat(),
-            total_questions=session.total_questions,
-            participants=participants,
-            question_stats=session.question_stats or []
-        )
+        return _to_quiz_session(session)
     finally:
         db.close()
 
@@ -138,22 +206,7 @@ def get_quiz_sessions(quiz_id: str) -> list[QuizSession]:
     db = SessionLocal()
     try:
         sessions = db.query(SessionDB).filter(SessionDB.quiz_id == quiz_id).order_by(SessionDB.ended_at.desc()).all()
-        result = []
-        for session in sessions:
-            participants = [PlayerResult(**p) for p in (session.participants or [])]
-            result.append(QuizSession(
-                id=session.id,
-                quiz_id=session.quiz_id,
-                quiz_name=session.quiz_name,
-                room_code=session.room_code,
-                host_id=session.host_id,
-                started_at=session.started_at.isoformat(),
-                ended_at=session.ended_at.isoformat(),
-                total_questions=session.total_questions,
-                participants=participants,
-                question_stats=session.question_stats or []
-            ))
-        return result
+        return [_to_quiz_session(session) for session in sessions]
     finally:
         db.close()
 
@@ -163,58 +216,56 @@ def get_user_sessions(user_id: str) -> list[QuizSession]:
     db = SessionLocal()
     try:
         sessions = db.query(SessionDB).filter(SessionDB.host_id == user_id).order_by(SessionDB.ended_at.desc()).all()
-        result = []
-        for session in sessions:
-            participants = [PlayerResult(**p) for p in (session.participants or [])]
-            result.append(QuizSession(
-                id=session.id,
-                quiz_id=session.quiz_id,
-                quiz_name=session.quiz_name,
-                room_code=session.room_code,
-                host_id=session.host_id,
-                started_at=session.started_at.isoformat(),
-                ended_at=session.ended_at.isoformat(),
-                total_questions=session.total_questions,
-                participants=participants,
-                question_stats=session.question_stats or []
-            ))
-        return result
+        return [_to_quiz_session(session) for session in sessions]
     finally:
         db.close()
 
 
 def get_quiz_analytics(quiz_id: str) -> dict:
-    """Get aggregated analytics for a quiz across all sessions."""
-    sessions = get_quiz_sessions(quiz_id)
+    """Get aggregated analytics for a quiz across all sessions, plus its most recent sessions.
+
+    May backfill (see ensure_quiz_analytics), so call it off the event loop.
+    """
+    ensure_quiz_analytics(quiz_id)
+    db = SessionLocal()
+    try:
+        analytics = db.query(QuizAnalyticsDB).filter(QuizAnalyticsDB.quiz_id == quiz_id).first()
+        if not analytics or not analytics.total_sessions:
+            return {
+                "total_sessions": 0,
+                "total_participants": 0,
+                "average_score": 0,
+                "average_accuracy": 0,
+                "question_stats": [],
+                "sessions": []
+            }
+
+        recent = db.query(SessionDB).filter(SessionDB.quiz_id == quiz_id).order_by(
+            SessionDB.ended_at.desc()
+        ).limit(RECENT_SESSIONS).all()
+
+        total_participants = analytics.total_participants
+        answered = analytics.total_questions_answered
+        avg_score = analytics.total_score / total_participants if total_participants > 0 else 0
+        avg_accuracy = (analytics.total_correct / answered * 100) if answered > 0 else 0
+
+        question_stats = []
+        for q_idx, stat in enumerate(analytics.question_stats or []):
+            accuracy = (stat["correct"] / stat["attempts"] * 100) if stat["attempts"] > 0 else 0
+            question_stats.append({
+                "question_index": q_idx,
+                "total_attempts": stat["attempts"],
+                "correct_attempts": stat["correct"],
+                "accuracy_percentage": round(accuracy, 1)
+            })
 
-    if not sessions:
         return {
-            "total_sessions": 0,
-            "total_participants": 0,
-            "average_score": 0,
-            "average_accuracy": 0,
-            "sessions": []
+            "total_sessions": analytics.total_sessions,
+            "total_participants": total_participants,
+            "average_score": round(avg_score, 1),
+            "average_accuracy": round(avg_accuracy, 1),
+            "question_stats": question_stats,
+            "sessions": [_to_quiz_session(s).model_dump() for s in recent]
         }
-
-    total_participants = 0
-    total_score = 0
-    total_correct = 0
-    total_questions_answered = 0
-
-    for session in sessions:
-        for participant in session.participants:
-            total_participants += 1
-            total_score += participant.score
-            total_correct += participant.correct_answers
-            total_questions_answered += session.total_questions
-
-    avg_score = total_score / total_participants if total_participants > 0 else 0
-    avg_accuracy = (total_correct / total_questions_answered * 100) if total_questions_answered > 0 else 0
-
-    return {
-        "total_sessions": len(sessions),
-        "total_participants": total_participants,
-        "average_score": round(avg_score, 1),
-        "average_accuracy": round(avg_accuracy, 1),
-        "sessions": [s.model_dump() for s in sessions[:10]]  # Last 10 sessions
-    }
+    finally:
+        db.close()
@@ -0,0 +1,111 @@
+from itertools import chain
+import numpy as np
+
+# Answers are packed into players x questions matrices: one uint64 bitmask per cell,
+# with bit o set when option o was selected. Set semantics, like scoring.
+INVALID_OPTION_BIT = 63  # Set for option indices that don't fit in the mask, so the answer never matches
+
+
+def option_mask(options) -> int:
+    mask = 0
+    for option in options:
+        mask |= (1 << option) if 0 <= option < INVALID_OPTION_BIT else (1 << INVALID_OPTION_BIT)
+    return mask
+
+
+def _option_bits(options: np.ndarray) -> np.ndarray:
+    in_range = (options >= 0) & (options < INVALID_OPTION_BIT)
+    shifts = np.where(in_range, options, INVALID_OPTION_BIT).astype(np.uint64)
+    return np.uint64(1) << shifts
+
+
+def pack_answers(answer_dicts: list[dict], n_questions: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pack each player's {question_index: options} into (answered, masks) matrices.
+
+    Question keys may be ints or strings (as stored in session JSON).
+    """
+    answered = np.zeros((len(answer_dicts), n_questions), dtype=bool)
+    masks = np.zeros((len(answer_dicts), n_questions), dtype=np.uint64)
+
+    # Flatten in C-level list operations, one step per player rather than per answer
+    per_player, q_keys, lengths, flat = [], [], [], []
+    for answers in answer_dicts:
+        per_player.append(len(answers))
+        q_keys.extend(answers)
+        selected = answers.values()
+        lengths.extend(map(len, selected))
+        flat.extend(chain.from_iterable(selected))
+    if not q_keys:
+        return answered, masks
+
+    rows = np.repeat(np.arange(len(answer_dicts)), per_player)
+    cols = np.array(q_keys, dtype=np.int64)
+    lengths = np.array(lengths, dtype=np.int64)
+    # OR each answer's option bits together; the trailing 0 keeps reduceat's indices in bounds
+    bits = np.append(_option_bits(np.array(flat, dtype=np.int64)), np.uint64(0))
+    starts = np.cumsum(lengths) - lengths
+    values = np.where(lengths > 0, np.bitwise_or.reduceat(bits, starts), np.uint64(0))
+
+    keep = (cols >= 0) & (cols < n_questions)
+    answered[rows[keep], cols[keep]] = True
+    masks[rows[keep], cols[keep]] = values[keep]
+    return answered, masks
+
+
+def pack_times(time_dicts: list[dict], n_questions: int) -> np.ndarray:
+    """Pack each player's {question_index: seconds} into a players x questions matrix, NaN where missing."""
+    times = np.full((len(time_dicts), n_questions), np.nan)
+    per_player, q_keys, values = [], [], []
+    for answer_times in time_dicts:
+        per_player.append(len(answer_times))
+        q_keys.extend(answer_times)
+        values.extend(answer_times.values())
+    if not q_keys:
+        return times
+
+    rows = np.repeat(np.arange(len(time_dicts)), per_player)
+    cols = np.array(q_keys, dtype=np.int64)
+    keep = (cols >= 0) & (cols < n_questions)
+    times[rows[keep], cols[keep]] = np.array(values, dtype=np.float64)[keep]
+    return times
+
+
+def correct_matrix(answered: np.ndarray, masks: np.ndarray, correct_options: list[list[int]]) -> np.ndarray:
+    """Boolean players x questions matrix of answers that match the correct options exactly."""
+    correct_masks = np.array([option_mask(options) for options in correct_options], dtype=np.uint64)
+    return answered & (masks == correct_masks)
+
+
+def option_counts(answered: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """Questions x options matrix counting how many players selected each option."""
+    valid = masks[answered] & np.uint64((1 << INVALID_OPTION_BIT) - 1)
+    n_options = int(np.bitwise_or.reduce(valid)).bit_length() if valid.size else 0
+    counts = np.zeros((masks.shape[1], n_options), dtype=np.int64)
+    for option in range(n_options):
+        counts[:, option] = ((masks >> np.uint64(option)) & np.uint64(1)).sum(axis=0)
+    return counts
+
+
+def build_question_stats(questions: list, answered: np.ndarray, masks: np.ndarray, correct: np.ndarray) -> list[dict]:
+    """Per-question attempts, accuracy and answer distribution, in QuestionStat's shape."""
+    attempts = answered.sum(axis=0)
+    correct_attempts = correct.sum(axis=0)
+    accuracy = np.round(np.divide(
+        correct_attempts * 100.0, attempts, out=np.zeros(len(questions)), where=attempts > 0
+    ), 1)
+    counts = option_counts(answered, masks)
+
+    stats = []
+    for q_idx, question in enumerate(questions):
+        stats.append({
+            "question_index": q_idx,
+            "question_text": question.text,
+            "correct_answers": list(question.correct),
+            "total_attempts": int(attempts[q_idx]),
+            "correct_attempts": int(correct_attempts[q_idx]),
+            "accuracy_percentage": float(accuracy[q_idx]),
+            "answer_distribution": {
+                option: int(count) for option, count in enumerate(counts[q_idx]) if count
+            },
+        })
+    return stats
@@ -1,8 +1,50 @@
 from datetime import datetime
 import uuid
 import math
+import threading
+import time
+from sqlalchemy import func, case
 from models import QuizTemplate, TemplateCategory
-from database import SessionLocal, TemplateDB, TemplateRatingDB, GroupDB, GroupMemberDB
+from database import SessionLocal, TemplateDB, TemplateRatingDB, GroupDB, QuizDB, QuestionSetDB
+from group_manager import get_user_group_ids
+from usage_counter import record_use, pending_uses
+import response_cache
+
+
+# Cached category counts: (category, group_id) -> count, where group_id is None
+# for templates visible to everyone. Reset by invalidate_template_caches().
+_category_counts_cache: dict[tuple[str, str | None], int] | None = None
+_cache_lock = threading.Lock()
+_cache_generation = 0  # Bumped on invalidation so data read before it is not stored
+
+# Cached template detail payloads: template_id -> (payload, stored_at), and the
+# templates cached per source quiz so quiz edits can drop them.
+_detail_cache: dict[str, tuple[dict, float]] = {}
+_detail_quiz_index: dict[str, set[str]] = {}
+DETAIL_TTL_SECONDS = 60.0
+
+
+def invalidate_template_caches():
+    """Drop cached marketplace data. Called after any template mutation."""
+    global _category_counts_cache, _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        _category_counts_cache = None
+        _detail_cache.clear()
+        _detail_quiz_index.clear()
+    response_cache.clear()
+
+
+def invalidate_quiz_template_details(quiz_id: str):
+    """Drop cached details of templates published from a quiz. Called after the quiz's questions change."""
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        template_ids = _detail_quiz_index.pop(quiz_id, set())
+        for template_id in template_ids:
+            _detail_cache.pop(template_id, None)
+    for template_id in template_ids:
+        response_cache.discard_path(f"/api/templates/{template_id}")
 
 
 def _get_visibility(t) -> str:
@@ -15,12 +57,11 @@ def _get_visibility(t) -> str:
     return "public"
 
 
-def _build_template(t, db=None) -> QuizTemplate:
+def _build_template(t, db=None, group_name: str | None = None) -> QuizTemplate:
     """Build a QuizTemplate from a TemplateDB row."""
     visibility = _get_visibility(t)
     group_id = getattr(t, 'group_id', None)
-    group_name = None
-    if group_id and db:
+    if group_id and db and group_name is None:
         group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
         if group:
             group_name = group.name
@@ -33,7 +74,7 @@ def _build_template(t, db=None) -> QuizTemplate:
         author_id=t.author_id,
         author_name=t.author_name,
         questions_count=t.questions_count,
-        uses_count=t.uses_count,
+        uses_count=(t.uses_count or 0) + pending_uses(t.id),
         rating=t.rating,
         ratings_count=t.ratings_count,
         created_at=t.created_at.isoformat(),
@@ -90,6 +131,7 @@ def publish_template(
         db.add(db_template)
         db.commit()
         db.refresh(db_template)
+        invalidate_template_caches()
 
         return _build_template(db_template, db)
     finally:
@@ -116,6 +158,7 @@ def delete_all_templates() -> int:
         db.query(TemplateRatingDB).delete()
         count = db.query(TemplateDB).delete()
         db.commit()
+        invalidate_template_caches()
         return count
     finally:
         db.close()
@@ -133,6 +176,43 @@ def get_template(template_id: str) -> QuizTemplate | None:
         db.close()
 
 
+def get_template_with_questions(template_id: str) -> dict | None:
+    """Get a template with its source quiz's questions, loaded in one query and cached per template."""
+    with _cache_lock:
+        cached = _detail_cache.get(template_id)
+        if cached and time.monotonic() - cached[1] <= DETAIL_TTL_SECONDS:
+            return cached[0]
+        generation = _cache_generation
+
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(TemplateDB, QuizDB.questions, QuestionSetDB.questions, GroupDB.name)
+            .outerjoin(QuizDB, QuizDB.id == TemplateDB.quiz_id)
+            .outerjoin(QuestionSetDB, QuestionSetDB.id == QuizDB.question_set_id)
+            .outerjoin(GroupDB, GroupDB.id == TemplateDB.group_id)
+            .filter(TemplateDB.id == template_id)
+            .first()
+        )
+        if not row:
+            return None
+        template, own_questions, shared_questions, group_name = row
+        # A quiz that was cloned from shares its questions through a question set
+        questions = own_questions if own_questions is not None else shared_questions
+
+        # Stored questions are already serialized Question dicts
+        payload = _build_template(template, group_name=group_name).model_dump()
+        payload["questions"] = list(questions or [])
+
+        with _cache_lock:
+            if generation == _cache_generation:
+                _detail_cache[template_id] = (payload, time.monotonic())
+                _detail_quiz_index.setdefault(template.quiz_id, set()).add(template_id)
+        return payload
+    finally:
+        db.close()
+
+
 def verify_template_passcode(template_id: str, passcode: str) -> bool:
     """Verify a passcode for a private template."""
     db = SessionLocal()
@@ -166,10 +246,7 @@ def get_all_templates(
         templates = query.all()
 
         # Get user's group IDs for group template filtering
-        user_group_ids = set()
-        if user_id:
-            memberships = db.query(GroupMemberDB).filter(GroupMemberDB.user_id == user_id).all()
-            user_group_ids = {m.group_id for m in memberships}
+        user_group_ids = get_user_group_ids(user_id) if user_id else frozenset()
 
         # Convert to QuizTemplate objects, filtering by visibility
         result = []
@@ -236,17 +313,9 @@ def get_user_templates(user_id: str) -> list[QuizTemplate]:
 
 
 def increment_uses(template_id: str) -> bool:
-    """Increment the uses count for a template."""
-    db = SessionLocal()
-    try:
-        template = db.query(TemplateDB).filter(TemplateDB.id == template_id).first()
-        if not template:
-            return False
-        template.uses_count += 1
-        db.commit()
-        return True
-    finally:
-        db.close()
+    """Increment the uses count for a template. Buffered and written in batches by usage_counter."""
+    record_use(template_id)
+    return True
 
 
 def rate_template(template_id: str, user_id: str, rating: int) -> QuizTemplate | None:
@@ -285,6 +354,7 @@ def rate_template(template_id: str, user_id: str, rating: int) -> QuizTemplate |
 
         db.commit()
         db.refresh(template)
+        invalidate_template_caches()
 
         return _build_template(template, db)
     finally:
@@ -343,6 +413,7 @@ def update_template(
 
         db.commit()
         db.refresh(template)
+        invalidate_template_caches()
 
         return _build_template(template, db)
     finally:
@@ -362,6 +433,7 @@ def delete_template(template_id: str, user_id: str) -> bool:
 
         db.delete(template)
         db.commit()
+        invalidate_template_caches()
         return True
     finally:
         db.close()
@@ -374,10 +446,7 @@ def get_featured_templates(limit: int = 6, user_id: str | None = None) -> list[Q
         templates = db.query(TemplateDB).all()
 
         # Get user's group IDs for group template filtering
-        user_group_ids = set()
-        if user_id:
-            memberships = db.query(GroupMemberDB).filter(GroupMemberDB.user_id == user_id).all()
-            user_group_ids = {m.group_id for m in memberships}
+        user_group_ids = get_user_group_ids(user_id) if user_id else frozenset()
 
         result = []
         for t in templates:
@@ -400,15 +469,44 @@ def get_featured_templates(limit: int = 6, user_id: str | None = None) -> list[Q
         db.close()
 
 
-def get_categories_with_counts() -> list[dict]:
-    """Get all categories with template counts."""
+def _load_category_counts(db) -> dict[tuple[str, str | None], int]:
+    """Count templates per category in one grouped query, split out by group for group templates."""
+    global _category_counts_cache
+    with _cache_lock:
+        if _category_counts_cache is not None:
+            return _category_counts_cache
+        generation = _cache_generation
+
+    # Group templates are keyed by their group ("" if none, so nobody sees them);
+    # everything else (public, private, legacy rows) is visible to everyone.
+    group_key = case(
+        (TemplateDB.visibility == "group", func.coalesce(TemplateDB.group_id, "")),
+        else_=None
+    )
+    rows = db.query(TemplateDB.category, group_key, func.count(TemplateDB.id)).group_by(
+        TemplateDB.category, group_key
+    ).all()
+    counts = {(cat, group_id): count for cat, group_id, count in rows}
+
+    with _cache_lock:
+        if generation == _cache_generation:
+            _category_counts_cache = counts
+    return counts
+
+
+def get_categories_with_counts(user_id: str | None = None) -> list[dict]:
+    """Get all categories with counts of the templates visible to the user."""
     db = SessionLocal()
     try:
-        templates = db.query(TemplateDB).all()
+        grouped = _load_category_counts(db)
+
+        # Get user's group IDs for group template counts
+        user_group_ids = get_user_group_ids(user_id) if user_id else frozenset()
+
         counts: dict[str, int] = {}
-        for template in templates:
-            cat = template.category
-            counts[cat] = counts.get(cat, 0) + 1
+        for (cat, group_id), count in grouped.items():
+            if group_id is None or group_id in user_group_ids:
+                counts[cat] = counts.get(cat, 0) + count
 
         return [
             {"category": cat.value, "count": counts.get(cat.value, 0)}
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Point the app at a throwaway SQLite file before any backend module creates the engine
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event
+from database import engine, init_db
+
+init_db()
+
+
+@pytest.fixture
+def count_queries():
+    """Count SQL statements run while the returned counter is in use: `with count_queries() as n: ...; n[0]`."""
+    @contextmanager
+    def counter():
+        count = [0]
+
+        def before_cursor_execute(*args):
+            count[0] += 1
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield count
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
@@ -0,0 +1,61 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from database import SessionLocal, UserDB, QuizDB, TemplateDB, GroupDB, GroupMemberDB
+from auth import create_access_token
+import main
+
+client = TestClient(main.app)
+ADMIN_HEADERS = {"Authorization": f"Bearer {create_access_token({'sub': 'admin', 'role': 'admin'})}"}
+
+
+def _seed(n: int):
+    """Add n users, each with a quiz, a template and a two-member group."""
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(UserDB, [dict(id=i, username=f"user-{i}") for i in ids])
+        db.bulk_insert_mappings(QuizDB, [
+            dict(id=i, name="quiz", owner_id=i, questions=[{"text": "q"}]) for i in ids
+        ])
+        db.bulk_insert_mappings(TemplateDB, [
+            dict(id=i, quiz_id=i, name="t", description="d", category="other", author_id=i, author_name="a")
+            for i in ids
+        ])
+        db.bulk_insert_mappings(GroupDB, [dict(id=i, name="g", owner_id=i) for i in ids])
+        db.bulk_insert_mappings(GroupMemberDB, [
+            dict(group_id=i, user_id=user_id, role="member") for i in ids for user_id in (i, ids[0])
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _queries(count_queries, path: str) -> int:
+    main._invalidate_admin_stats()
+    with count_queries() as n:
+        response = client.get(path, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    return n[0]
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/api/admin/stats", 8),
+    ("/api/admin/users", 2),
+    ("/api/admin/quizzes?sort=owner_username", 2),
+    ("/api/admin/templates", 2),
+    ("/api/admin/groups?sort=member_count", 2),
+])
+def test_admin_query_count_does_not_grow_with_rows(count_queries, path, expected):
+    _seed(20)
+    small = _queries(count_queries, path)
+    _seed(500)
+    large = _queries(count_queries, path)
+    assert small == large == expected
+
+
+def test_admin_lists_are_paged():
+    _seed(150)
+    response = client.get("/api/admin/users?offset=100&limit=30", headers=ADMIN_HEADERS)
+    assert len(response.json()) == 30
+    assert int(response.headers["X-Total-Count"]) >= 150
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import ai_service
+
+
+class FakeModel(BaseHTTPRequestHandler):
+    """Streams chat-completion chunks, one question every `delay` seconds."""
+    protocol_version = "HTTP/1.1"
+    delay = 0.05
+    questions = 3
+    requests = 0
+    disconnected = threading.Event()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["content-length"]))
+        type(self).requests += 1
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+        pieces = ['{"questions": ['] + [
+            (", " if i else "") + json.dumps({"text": f"Question {i}", "options": ["a", "b"], "correct": [1]})
+            for i in range(self.questions)
+        ] + ["]}"]
+        try:
+            for piece in pieces:
+                time.sleep(self.delay)
+                chunk = {"id": "x", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                self._send(f"data: {json.dumps(chunk)}\n\n")
+            self._send("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            type(self).disconnected.set()
+
+    def _send(self, text: str):
+        data = text.encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    FakeModel.delay, FakeModel.questions, FakeModel.requests = 0.05, 3, 0
+    FakeModel.disconnected.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeModel)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(ai_service, "GROQ_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(ai_service, "_async_client", None)
+    yield FakeModel
+    server.shutdown()
+    server.server_close()
+
+
+def _run(coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            await ai_service.close_async_client()
+    return asyncio.run(run())
+
+
+def test_generates_questions(fake_model):
+    questions = _run(ai_service.generate_questions_async("streamed", "u1", use_cache=False))
+    assert [q.text for q in questions] == ["Question 0", "Question 1", "Question 2"]
+
+
+def test_times_out(fake_model, monkeypatch):
+    fake_model.delay = 1.0
+    monkeypatch.setattr(ai_service, "AI_TIMEOUT_SECONDS", 0.3)
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        _run(ai_service.generate_questions_async("slow", "u1", use_cache=False))
+    assert time.monotonic() - start < 1.0
+    assert not ai_service._user_generations  # The user's slot is released
+
+
+def test_second_generation_for_same_user_is_rejected(fake_model):
+    fake_model.delay = 0.2
+
+    async def both():
+        first = asyncio.create_task(ai_service.generate_questions_async("first", "u1", use_cache=False))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ai_service.GenerationBusyError):
+            await ai_service.generate_questions_async("second", "u1", use_cache=False)
+        other_user = await ai_service.generate_questions_async("other", "u2", use_cache=False)
+        return await first, other_user
+
+    first, other_user = _run(both())
+    assert len(first) == 3 and len(other_user) == 3
+    assert fake_model.requests == 2
+
+
+def test_closing_the_stream_cancels_the_model_request(fake_model):
+    fake_model.delay, fake_model.questions = 0.1, 50
+
+    async def first_only():
+        stream = ai_service.stream_questions_async("long", "u1", use_cache=False)
+        question = await stream.__anext__()
+        await stream.aclose()
+        return question
+
+    assert _run(first_only()).text == "Question 0"
+    assert fake_model.disconnected.wait(2)  # Upstream saw the connection drop long before 50 questions
+    assert not ai_service._user_generations
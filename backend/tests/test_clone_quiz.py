@@ -0,0 +1,49 @@
+import uuid
+import pytest
+from database import SessionLocal, UserDB, QuizDB, QuestionSetDB
+import quiz_manager
+
+
+def _add_quiz(n_questions: int) -> tuple[str, list[dict]]:
+    owner_id, quiz_id = str(uuid.uuid4()), str(uuid.uuid4())
+    questions = [
+        {"id": str(i), "text": f"Question {i}", "type": "single", "options": ["a", "b", "c", "d"],
+         "correct": [i % 4], "time_limit": 30, "points": 100}
+        for i in range(n_questions)
+    ]
+    db = SessionLocal()
+    try:
+        db.add(UserDB(id=owner_id, username=f"owner-{owner_id}"))
+        db.add(QuizDB(id=quiz_id, name="Source", owner_id=owner_id, questions=questions))
+        db.commit()
+    finally:
+        db.close()
+    return quiz_id, questions
+
+
+@pytest.mark.parametrize("n_questions", [10, 1000])
+def test_clone_runs_a_fixed_number_of_statements(count_queries, n_questions):
+    source_id, questions = _add_quiz(n_questions)
+    with count_queries() as first:
+        clone = quiz_manager.clone_quiz(source_id, "cloner", "First clone")
+    with count_queries() as second:
+        quiz_manager.clone_quiz(source_id, "cloner", "Second clone")
+
+    assert clone["questions"] == questions
+    # Lock the source, snapshot its questions, point it at the snapshot, insert, read back
+    assert first[0] == 5
+    # Later clones only lock the source, insert and read back
+    assert second[0] == 3
+
+
+def test_clones_share_one_question_set():
+    source_id, questions = _add_quiz(3)
+    clones = [quiz_manager.clone_quiz(source_id, "cloner", f"Clone {i}") for i in range(3)]
+    db = SessionLocal()
+    try:
+        set_ids = {db.get(QuizDB, quiz_id).question_set_id for quiz_id in [source_id] + [c["id"] for c in clones]}
+        assert len(set_ids) == 1 and None not in set_ids
+        assert db.get(QuestionSetDB, set_ids.pop()).questions == questions
+    finally:
+        db.close()
+    assert quiz_manager.get_quiz(clones[0]["id"]).questions[2].text == "Question 2"
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+import google_tokens
+
+
+def _key_pair(kid: str) -> tuple[bytes, dict]:
+    """A private key PEM and the matching public JWK."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+
+
+PRIVATE_KEY, PUBLIC_JWK = _key_pair("key-1")
+OTHER_PRIVATE_KEY, _ = _key_pair("key-1")
+
+
+def _id_token(private_key: bytes = PRIVATE_KEY, kid: str = "key-1", **claims) -> str:
+    payload = {"iss": "https://accounts.google.com", "sub": "google-user", "email": "a@example.com",
+               "exp": int(time.time()) + 600, **claims}
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeGoogle(BaseHTTPRequestHandler):
+    """Serves /certs with a configurable Cache-Control max-age, and /tokeninfo."""
+    max_age = 3600
+    cert_requests = 0
+    tokeninfo_requests = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/certs":
+            type(self).cert_requests += 1
+            self._json({"keys": [PUBLIC_JWK]}, {"Cache-Control": f"public, max-age={self.max_age}"})
+        elif url.path == "/tokeninfo":
+            type(self).tokeninfo_requests += 1
+            token = parse_qs(url.query)["id_token"][0]
+            self._json(jwt.get_unverified_claims(token))
+        else:
+            self.send_error(404)
+
+    def _json(self, data: dict, headers: dict = {}):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_google(monkeypatch):
+    FakeGoogle.max_age, FakeGoogle.cert_requests, FakeGoogle.tokeninfo_requests = 3600, 0, 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGoogle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(google_tokens, "GOOGLE_CERTS_URL", f"{base}/certs")
+    monkeypatch.setattr(google_tokens, "GOOGLE_TOKENINFO_URL", f"{base}/tokeninfo")
+    monkeypatch.setattr(google_tokens, "GOOGLE_CLIENT_ID", None)
+    monkeypatch.setattr(google_tokens, "_keys", {"jwks": None, "expires_at": 0.0, "fetched_at": 0.0})
+    monkeypatch.setattr(google_tokens, "_refresh_lock", asyncio.Lock())
+    yield FakeGoogle
+    server.shutdown()
+    server.server_close()
+
+
+def _verify(*credentials):
+    async def run():
+        try:
+            return [await google_tokens.verify_google_id_token(c) for c in credentials]
+        finally:
+            await google_tokens.close_http_client()
+    return asyncio.run(run())
+
+
+def test_verifies_locally_with_cached_keys(fake_google):
+    first, second = _verify(_id_token(), _id_token(sub="other-user"))
+    assert first["sub"] == "google-user" and second["sub"] == "other-user"
+    assert fake_google.cert_requests == 1
+    assert fake_google.tokeninfo_requests == 0
+
+
+def test_rejects_bad_signature_and_issuer(fake_google):
+    assert _verify(_id_token(OTHER_PRIVATE_KEY), _id_token(iss="evil.example.com")) == [None, None]
+    assert fake_google.tokeninfo_requests == 0
+
+
+def test_refetches_keys_when_max_age_expires(fake_google, monkeypatch):
+    fake_google.max_age = 0
+    monkeypatch.setattr(google_tokens, "MIN_REFRESH_INTERVAL", 0)
+    assert all(_verify(_id_token(), _id_token()))
+    assert fake_google.cert_requests == 2
+
+    fake_google.max_age = 3600
+    assert all(_verify(_id_token(), _id_token()))
+    assert fake_google.cert_requests == 3
+
+
+def test_falls_back_to_tokeninfo_when_keys_are_unreachable(fake_google, monkeypatch):
+    monkeypatch.setattr(google_tokens, "GOOGLE_CERTS_URL", "http://127.0.0.1:1/certs")
+    claims, = _verify(_id_token())
+    assert claims["sub"] == "google-user"
+    assert fake_google.tokeninfo_requests == 1
+
+    monkeypatch.setattr(google_tokens, "GOOGLE_TOKENINFO_URL", "http://127.0.0.1:1/tokeninfo")
+    with pytest.raises(httpx.RequestError):
+        _verify(_id_token())
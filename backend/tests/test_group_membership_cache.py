@@ -0,0 +1,50 @@
+import uuid
+from database import SessionLocal, UserDB
+import group_manager
+
+
+def _add_user() -> str:
+    user_id = str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        db.add(UserDB(id=user_id, username=f"user-{user_id}"))
+        db.commit()
+    finally:
+        db.close()
+    return user_id
+
+
+def test_removal_during_cache_fill_is_not_cached(monkeypatch):
+    owner_id, member_id = _add_user(), _add_user()
+    group = group_manager.create_group("group", owner_id)
+    assert group_manager.add_member(group.id, member_id)
+    real_session = group_manager.SessionLocal
+
+    def session_then_remove():
+        # The member is removed after the cache fill has read the memberships, before it stores them
+        db = real_session()
+        close = db.close
+
+        def close_and_remove():
+            close()
+            monkeypatch.setattr(group_manager, "SessionLocal", real_session)
+            assert group_manager.remove_member(group.id, member_id)
+
+        db.close = close_and_remove
+        return db
+
+    monkeypatch.setattr(group_manager, "SessionLocal", session_then_remove)
+    assert group.id in group_manager.get_user_group_ids(member_id)  # Read before the removal
+    assert not group_manager.is_group_member(group.id, member_id)
+
+
+def test_membership_is_cached(monkeypatch):
+    owner_id = _add_user()
+    group = group_manager.create_group("group", owner_id)
+    assert group_manager.is_group_member(group.id, owner_id)
+
+    def no_database():
+        raise AssertionError("membership was read from the database again")
+
+    monkeypatch.setattr(group_manager, "SessionLocal", no_database)
+    assert group_manager.is_group_member(group.id, owner_id)
@@ -0,0 +1,53 @@
+import uuid
+import pytest
+from database import SessionLocal, UserDB, GroupMemberDB
+import group_manager
+
+
+def _add_users(n: int) -> list[str]:
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(UserDB, [dict(id=user_id, username=f"user-{user_id}") for user_id in ids])
+        db.commit()
+    finally:
+        db.close()
+    return ids
+
+
+@pytest.fixture
+def groups():
+    """An owner with three groups of growing size; returns (owner_id, group_ids)."""
+    owner_id = _add_users(1)[0]
+    group_ids = []
+    for size in (5, 50, 120):
+        group = group_manager.create_group(f"group-{size}", owner_id)
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(GroupMemberDB, [
+                dict(group_id=group.id, user_id=user_id, role="member") for user_id in _add_users(size)
+            ])
+            db.commit()
+        finally:
+            db.close()
+        group_ids.append(group.id)
+    return owner_id, group_ids
+
+
+def test_get_user_groups_query_count_is_constant(groups, count_queries):
+    owner_id, group_ids = groups
+    with count_queries() as n:
+        result = group_manager.get_user_groups(owner_id, member_limit=20)
+    assert [g.id for g in result] == group_ids
+    assert [g.member_count for g in result] == [6, 51, 121]
+    assert [len(g.members) for g in result] == [6, 20, 20]
+    assert n[0] == 2
+
+
+def test_get_group_query_count_is_constant(groups, count_queries):
+    _, group_ids = groups
+    with count_queries() as n:
+        group = group_manager.get_group(group_ids[2], member_offset=100, member_limit=50)
+    assert group.member_count == 121
+    assert len(group.members) == 21
+    assert n[0] == 2
@@ -0,0 +1,67 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from database import SessionLocal, UserDB, QuizDB, TemplateDB, GroupDB
+import main
+import template_manager
+
+client = TestClient(main.app)
+
+
+def _add_template(visibility: str = "public") -> tuple[str, str]:
+    """Returns (template_id, quiz_id) for a template of a one-question quiz."""
+    user_id, quiz_id, template_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        db.add(UserDB(id=user_id, username=f"author-{user_id}"))
+        db.add(QuizDB(id=quiz_id, name="Quiz", owner_id=user_id, questions=[{"text": "Before edit"}]))
+        group_id = None
+        if visibility == "group":
+            group_id = str(uuid.uuid4())
+            db.add(GroupDB(id=group_id, name="Group", owner_id=user_id))
+        db.add(TemplateDB(
+            id=template_id, quiz_id=quiz_id, name="Template", description="d", category="other",
+            author_id=user_id, author_name="author", visibility=visibility, group_id=group_id
+        ))
+        db.commit()
+    finally:
+        db.close()
+    return template_id, quiz_id
+
+
+@pytest.mark.parametrize("visibility, cache_control", [
+    ("public", "public"),
+    ("group", "private"),
+    ("private", "private"),
+])
+def test_only_public_template_details_are_shared_cacheable(visibility, cache_control):
+    template_id, _ = _add_template(visibility)
+    for _ in range(2):  # Computed, then served from the cache
+        response = client.get(f"/api/templates/{template_id}")
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"].startswith(cache_control + ",")
+
+    not_modified = client.get(f"/api/templates/{template_id}", headers={"If-None-Match": response.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["Cache-Control"].startswith(cache_control + ",")
+
+
+def test_edit_during_detail_cache_fill_is_not_cached(monkeypatch):
+    template_id, quiz_id = _add_template()
+    build_template = template_manager._build_template
+
+    def build_then_edit(*args, **kwargs):
+        # The questions change after the fill has read them, before it stores them
+        monkeypatch.setattr(template_manager, "_build_template", build_template)
+        db = SessionLocal()
+        try:
+            db.get(QuizDB, quiz_id).questions = [{"text": "After edit"}]
+            db.commit()
+        finally:
+            db.close()
+        template_manager.invalidate_quiz_template_details(quiz_id)
+        return build_template(*args, **kwargs)
+
+    monkeypatch.setattr(template_manager, "_build_template", build_then_edit)
+    assert template_manager.get_template_with_questions(template_id)["questions"] == [{"text": "Before edit"}]
+    assert template_manager.get_template_with_questions(template_id)["questions"] == [{"text": "After edit"}]
@@ -0,0 +1,72 @@
+import threading
+import uuid
+from sqlalchemy import event
+from database import SessionLocal, engine, UserDB, TemplateDB
+import usage_counter
+
+THREADS = 8
+USES_PER_THREAD = 2000
+
+
+def _add_template() -> str:
+    user_id, template_id = str(uuid.uuid4()), str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        db.add(UserDB(id=user_id, username=f"author-{user_id}"))
+        db.add(TemplateDB(
+            id=template_id, quiz_id=str(uuid.uuid4()), name="t", description="d", category="c",
+            author_id=user_id, author_name="author", uses_count=0
+        ))
+        db.commit()
+    finally:
+        db.close()
+    return template_id
+
+
+def test_concurrent_uses_are_all_written_in_batches():
+    template_id = _add_template()
+    usage_counter.flush_uses()  # Start from an empty buffer
+
+    commits = [0]
+
+    def on_commit(conn):
+        commits[0] += 1
+
+    done = threading.Event()
+    flushes = [0]
+
+    def record():
+        for _ in range(USES_PER_THREAD):
+            usage_counter.record_use(template_id)
+
+    def flush_until_done():
+        while not done.is_set():
+            if usage_counter.flush_uses():
+                flushes[0] += 1
+
+    event.listen(engine, "commit", on_commit)
+    try:
+        flusher = threading.Thread(target=flush_until_done)
+        flusher.start()
+        recorders = [threading.Thread(target=record) for _ in range(THREADS)]
+        for t in recorders:
+            t.start()
+        for t in recorders:
+            t.join()
+        done.set()
+        flusher.join()
+        if usage_counter.flush_uses():
+            flushes[0] += 1
+    finally:
+        event.remove(engine, "commit", on_commit)
+
+    db = SessionLocal()
+    try:
+        uses_count = db.query(TemplateDB.uses_count).filter(TemplateDB.id == template_id).scalar()
+    finally:
+        db.close()
+    assert uses_count == THREADS * USES_PER_THREAD
+    assert usage_counter.pending_uses(template_id) == 0
+    # One commit per non-empty flush, far fewer than one per use
+    assert commits[0] == flushes[0]
+    assert flushes[0] < THREADS * USES_PER_THREAD
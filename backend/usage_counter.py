@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from sqlalchemy import update
+from database import SessionLocal, TemplateDB
+
+# Write-behind buffer for template uses_count: template_id -> pending increments
+_pending_uses: dict[str, int] = {}
+_lock = threading.Lock()
+
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+def record_use(template_id: str, amount: int = 1) -> None:
+    """Buffer a uses_count increment for a template. Written on the next flush."""
+    with _lock:
+        _pending_uses[template_id] = _pending_uses.get(template_id, 0) + amount
+
+
+def pending_uses(template_id: str) -> int:
+    """Get the number of buffered increments not yet written for a template."""
+    with _lock:
+        return _pending_uses.get(template_id, 0)
+
+
+def flush_uses() -> int:
+    """Write all buffered increments in a single transaction. Returns the number of templates updated."""
+    with _lock:
+        if not _pending_uses:
+            return 0
+        batch = dict(_pending_uses)
+        _pending_uses.clear()
+
+    db = SessionLocal()
+    try:
+        # Atomic in-database increments, so concurrent writers never lose updates
+        for template_id, amount in batch.items():
+            db.execute(
+                update(TemplateDB)
+                .where(TemplateDB.id == template_id)
+                .values(uses_count=TemplateDB.uses_count + amount)
+            )
+        db.commit()
+        return len(batch)
+    except Exception:
+        db.rollback()
+        # Put the batch back so the increments are retried on the next flush
+        with _lock:
+            for template_id, amount in batch.items():
+                _pending_uses[template_id] = _pending_uses.get(template_id, 0) + amount
+        raise
+    finally:
+        db.close()
+
+
+async def run_flush_loop(interval: float = FLUSH_INTERVAL_SECONDS):
+    """Periodically flush buffered increments until cancelled."""
+    loop = asyncio.get_event_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await loop.run_in_executor(None, flush_uses)
+        except Exception as e:
+            print(f"WARNING: Failed to flush template uses: {e}")
@@ -2,8 +2,13 @@ import uuid
 import re
 from typing import Optional
 from models import User
-from auth import get_password_hash, verify_password
+from auth import get_password_hash_async, verify_password_async, password_needs_rehash
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from database import SessionLocal, UserDB
+from template_manager import invalidate_template_caches
+from group_manager import invalidate_membership_cache
+from quiz_manager import delete_orphan_question_sets
 
 
 def generate_username_from_email(email: str) -> str:
@@ -36,13 +41,29 @@ def generate_username_from_email(email: str) -> str:
     return username
 
 
+def _username_matches(username: str):
+    """Case-insensitive username comparison that can use the lower(username) index."""
+    return func.lower(UserDB.username) == username.lower()
+
+
+def _email_matches(email: str):
+    """Case-insensitive email comparison that can use the lower(email) index."""
+    return func.lower(UserDB.email) == email.lower()
+
+
 def get_unique_username(base_username: str) -> str:
     """Get a unique username by appending numbers if needed."""
     db = SessionLocal()
     try:
+        # Fetch every taken name sharing the prefix in one query, then pick the first free suffix
+        rows = db.query(UserDB.username).filter(
+            func.lower(UserDB.username).startswith(base_username.lower(), autoescape=True)
+        ).all()
+        taken = {name.lower() for (name,) in rows}
+
         username = base_username
         counter = 1
-        while db.query(UserDB).filter(UserDB.username.ilike(username)).first():
+        while username.lower() in taken:
             username = f"{base_username}_{counter}"
             counter += 1
         return username
@@ -56,11 +77,11 @@ def suggest_username(email: str) -> str:
     return get_unique_username(base_username)
 
 
-def create_user(email: str, password: str, username: Optional[str] = None) -> Optional[User]:
+async def create_user(email: str, password: str, username: Optional[str] = None) -> Optional[User]:
     db = SessionLocal()
     try:
         # Check if email already exists
-        if db.query(UserDB).filter(UserDB.email.ilike(email)).first():
+        if db.query(UserDB).filter(_email_matches(email)).first():
             return None
 
         # Generate username if not provided
@@ -68,12 +89,21 @@ def create_user(email: str, password: str, username: Optional[str] = None) -> Op
             username = suggest_username(email)
         else:
             # Check if provided username already exists
-            if db.query(UserDB).filter(UserDB.username.ilike(username)).first():
+            if db.query(UserDB).filter(_username_matches(username)).first():
                 return None
+    finally:
+        db.close()
 
-        user_id = str(uuid.uuid4())
-        hashed_password = get_password_hash(password)
+    # Hash off the event loop, without holding a DB connection
+    hashed_password = await get_password_hash_async(password)
+
+    db = SessionLocal()
+    try:
+        # Another registration may have taken the email or username while hashing
+        if db.query(UserDB).filter(_email_matches(email) | _username_matches(username)).first():
+            return None
 
+        user_id = str(uuid.uuid4())
         db_user = UserDB(
             id=user_id,
             username=username,
@@ -82,22 +112,26 @@ def create_user(email: str, password: str, username: Optional[str] = None) -> Op
             google_id=None
         )
         db.add(db_user)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # Lost a race with a concurrent registration
+            return None
 
         return User(id=user_id, username=username, email=email)
     finally:
         db.close()
 
 
-def authenticate_user(username_or_email: str, password: str) -> Optional[User]:
+async def authenticate_user(username_or_email: str, password: str) -> Optional[User]:
     db = SessionLocal()
     try:
         # Try to find user by username first
-        user = db.query(UserDB).filter(UserDB.username.ilike(username_or_email)).first()
+        user = db.query(UserDB).filter(_username_matches(username_or_email)).first()
 
         # If not found, try by email
         if not user:
-            user = db.query(UserDB).filter(UserDB.email.ilike(username_or_email)).first()
+            user = db.query(UserDB).filter(_email_matches(username_or_email)).first()
 
         if not user:
             return None
@@ -106,13 +140,29 @@ def authenticate_user(username_or_email: str, password: str) -> Optional[User]:
         if not user.hashed_password:
             return None
 
-        if not verify_password(password, user.hashed_password):
-            return None
-
-        return User(id=user.id, username=user.username, email=user.email)
+        result = User(id=user.id, username=user.username, email=user.email)
+        hashed_password = user.hashed_password
     finally:
         db.close()
 
+    if not await verify_password_async(password, hashed_password):
+        return None
+
+    # Transparently upgrade hashes made with an old bcrypt cost
+    if password_needs_rehash(hashed_password):
+        new_hash = await get_password_hash_async(password)
+        db = SessionLocal()
+        try:
+            db.query(UserDB).filter(
+                UserDB.id == result.id,
+                UserDB.hashed_password == hashed_password
+            ).update({UserDB.hashed_password: new_hash}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    return result
+
 
 def get_user_by_id(user_id: str) -> Optional[User]:
     db = SessionLocal()
@@ -139,7 +189,7 @@ def update_user_profile(user_id: str, username: str) -> Optional[User]:
 
         # Check if new username is already taken by another user
         existing = db.query(UserDB).filter(
-            UserDB.username.ilike(username),
+            _username_matches(username),
             UserDB.id != user_id
         ).first()
         if existing:
@@ -154,7 +204,7 @@ def update_user_profile(user_id: str, username: str) -> Optional[User]:
         db.close()
 
 
-def change_user_password(user_id: str, current_password: str, new_password: str) -> bool:
+async def change_user_password(user_id: str, current_password: str, new_password: str) -> bool:
     """Change user's password."""
     db = SessionLocal()
     try:
@@ -165,34 +215,54 @@ def change_user_password(user_id: str, current_password: str, new_password: str)
         # Google-only users can't change password (they don't have one)
         if not user.hashed_password:
             return False
+        hashed_password = user.hashed_password
+    finally:
+        db.close()
 
-        # Verify current password
-        if not verify_password(current_password, user.hashed_password):
-            return False
+    # Verify current password
+    if not await verify_password_async(current_password, hashed_password):
+        return False
 
-        # Update password
-        user.hashed_password = get_password_hash(new_password)
+    # Update password
+    new_hash = await get_password_hash_async(new_password)
+    db = SessionLocal()
+    try:
+        db.query(UserDB).filter(UserDB.id == user_id).update(
+            {UserDB.hashed_password: new_hash}, synchronize_session=False
+        )
         db.commit()
         return True
     finally:
         db.close()
 
 
-def delete_user_account(user_id: str, password: str) -> bool:
+async def delete_user_account(user_id: str, password: str) -> bool:
     """Delete user account after verifying password."""
     db = SessionLocal()
     try:
         user = db.query(UserDB).filter(UserDB.id == user_id).first()
         if not user:
             return False
+        hashed_password = user.hashed_password
+    finally:
+        db.close()
 
-        # Verify password (if they have one - Google users need their Google account)
-        if user.hashed_password:
-            if not verify_password(password, user.hashed_password):
-                return False
+    # Verify password (if they have one - Google users need their Google account)
+    if hashed_password:
+        if not await verify_password_async(password, hashed_password):
+            return False
 
+    db = SessionLocal()
+    try:
+        user = db.query(UserDB).filter(UserDB.id == user_id).first()
+        if not user:
+            return False
         db.delete(user)
         db.commit()
+        delete_orphan_question_sets()
+        # The user's templates and owned groups are deleted with them
+        invalidate_template_caches()
+        invalidate_membership_cache()
         return True
     finally:
         db.close()
@@ -208,7 +278,7 @@ def get_or_create_google_user(google_id: str, email: str, name: str) -> User:
             return User(id=user.id, username=user.username, email=user.email)
 
         # Check if a user with this email already exists
-        existing_user = db.query(UserDB).filter(UserDB.email.ilike(email)).first()
+        existing_user = db.query(UserDB).filter(_email_matches(email)).first()
         if existing_user:
             # Link Google account to existing user
             existing_user.google_id = google_id
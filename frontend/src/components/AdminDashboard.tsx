@@ -23,6 +23,10 @@ interface Stats {
 }
 
 type Tab = 'overview' | 'users' | 'quizzes' | 'templates' | 'groups';
+type ListTab = Exclude<Tab, 'overview'>;
+
+// Admin lists are paged server-side; the full count comes back in X-Total-Count
+const PAGE_SIZE = 100;
 
 export function AdminDashboard() {
   const [token, setToken] = useState<string | null>(localStorage.getItem('admin_token'));
@@ -34,6 +38,7 @@ export function AdminDashboard() {
   const [quizzes, setQuizzes] = useState<any[]>([]);
   const [templates, setTemplates] = useState<any[]>([]);
   const [groups, setGroups] = useState<any[]>([]);
+  const [totals, setTotals] = useState<Partial<Record<ListTab, number>>>({});
   const [loading, setLoading] = useState(false);
 
   const headers: Record<string, string> = token ? { Authorization: `Bearer ${token}` } : {};
@@ -85,25 +90,36 @@ export function AdminDashboard() {
     } catch {} finally { setLoading(false); }
   };
 
-  const fetchUsers = async () => {
-    const res = await fetch(`${API_URL}/admin/users`, { headers });
-    if (res.ok) setUsers(await res.json());
-  };
-
-  const fetchQuizzes = async () => {
-    const res = await fetch(`${API_URL}/admin/quizzes`, { headers });
-    if (res.ok) setQuizzes(await res.json());
+  // Fetch one page; offset 0 replaces the list, later offsets append to it
+  const fetchList = async (
+    type: ListTab,
+    setList: React.Dispatch<React.SetStateAction<any[]>>,
+    offset: number
+  ) => {
+    const res = await fetch(`${API_URL}/admin/${type}?offset=${offset}&limit=${PAGE_SIZE}`, { headers });
+    if (!res.ok) return;
+    const rows = await res.json();
+    const total = Number(res.headers.get('X-Total-Count') ?? offset + rows.length);
+    setTotals((prev) => ({ ...prev, [type]: total }));
+    setList((prev) => (offset === 0 ? rows : [...prev, ...rows]));
   };
 
-  const fetchTemplates = async () => {
-    const res = await fetch(`${API_URL}/admin/templates`, { headers });
-    if (res.ok) setTemplates(await res.json());
-  };
+  const fetchUsers = (offset = 0) => fetchList('users', setUsers, offset);
+  const fetchQuizzes = (offset = 0) => fetchList('quizzes', setQuizzes, offset);
+  const fetchTemplates = (offset = 0) => fetchList('templates', setTemplates, offset);
+  const fetchGroups = (offset = 0) => fetchList('groups', setGroups, offset);
 
-  const fetchGroups = async () => {
-    const res = await fetch(`${API_URL}/admin/groups`, { headers });
-    if (res.ok) setGroups(await res.json());
-  };
+  const renderLoadMore = (type: ListTab, loaded: number, fetchMore: (offset: number) => void) =>
+    loaded < (totals[type] ?? 0) && (
+      <div className="p-4 border-t border-white/10 text-center">
+        <button
+          onClick={() => fetchMore(loaded)}
+          className="px-4 py-2 text-sm text-white/70 bg-white/5 hover:bg-white/10 rounded-lg transition-colors"
+        >
+          Load more ({loaded} of {totals[type]})
+        </button>
+      </div>
+    );
 
   const handleDelete = async (type: string, id: string) => {
     if (!confirm(`Delete this ${type}? This cannot be undone.`)) return;
@@ -279,7 +295,7 @@ export function AdminDashboard() {
         {activeTab === 'users' && (
           <div className="bg-[#1A1A1F] rounded-2xl border border-white/10 overflow-hidden">
             <div className="p-5 border-b border-white/10 flex items-center justify-between">
-              <h3 className="font-semibold">All Users ({users.length})</h3>
+              <h3 className="font-semibold">All Users ({totals.users ?? users.length})</h3>
             </div>
             <div className="overflow-x-auto">
               <table className="w-full text-sm">
@@ -301,6 +317,7 @@ export function AdminDashboard() {
                 </tbody>
               </table>
             </div>
+            {renderLoadMore('users', users.length, fetchUsers)}
           </div>
         )}
 
@@ -308,7 +325,7 @@ export function AdminDashboard() {
         {activeTab === 'quizzes' && (
           <div className="bg-[#1A1A1F] rounded-2xl border border-white/10 overflow-hidden">
             <div className="p-5 border-b border-white/10">
-              <h3 className="font-semibold">All Quizzes ({quizzes.length})</h3>
+              <h3 className="font-semibold">All Quizzes ({totals.quizzes ?? quizzes.length})</h3>
             </div>
             <div className="overflow-x-auto">
               <table className="w-full text-sm">
@@ -330,6 +347,7 @@ export function AdminDashboard() {
                 </tbody>
               </table>
             </div>
+            {renderLoadMore('quizzes', quizzes.length, fetchQuizzes)}
           </div>
         )}
 
@@ -337,7 +355,7 @@ export function AdminDashboard() {
         {activeTab === 'templates' && (
           <div className="bg-[#1A1A1F] rounded-2xl border border-white/10 overflow-hidden">
             <div className="p-5 border-b border-white/10">
-              <h3 className="font-semibold">All Templates ({templates.length})</h3>
+              <h3 className="font-semibold">All Templates ({totals.templates ?? templates.length})</h3>
             </div>
             <div className="overflow-x-auto">
               <table className="w-full text-sm">
@@ -367,6 +385,7 @@ export function AdminDashboard() {
                 </tbody>
               </table>
             </div>
+            {renderLoadMore('templates', templates.length, fetchTemplates)}
           </div>
         )}
 
@@ -374,7 +393,7 @@ export function AdminDashboard() {
         {activeTab === 'groups' && (
           <div className="bg-[#1A1A1F] rounded-2xl border border-white/10 overflow-hidden">
             <div className="p-5 border-b border-white/10">
-              <h3 className="font-semibold">All Groups ({groups.length})</h3>
+              <h3 className="font-semibold">All Groups ({totals.groups ?? groups.length})</h3>
             </div>
             <div className="overflow-x-auto">
               <table className="w-full text-sm">
@@ -396,6 +415,7 @@ export function AdminDashboard() {
                 </tbody>
               </table>
             </div>
+            {renderLoadMore('groups', groups.length, fetchGroups)}
           </div>
         )}
       </div>
@@ -340,8 +340,48 @@ export function CreateQuiz({ quiz: existingQuiz, onBack, onQuizCreated, onHost }
     }
   };
 
+  const uploadQuestionFile = async (file: File) => {
+    if (!quiz) return;
+    setError('');
+    const formData = new FormData();
+    formData.append('file', file);
+
+    try {
+      const response = await fetch(
+        `${API_URL}/quizzes/${quiz.id}/questions/import/file?replace=${replaceQuestions}`,
+        {
+          method: 'POST',
+          headers: { Authorization: `Bearer ${token}` },
+          body: formData,
+        }
+      );
+      const data = await response.json();
+      if (!response.ok) {
+        setError(data.detail || 'Failed to import questions');
+        return;
+      }
+      fetchQuiz(quiz.id);
+      if (data.failed) {
+        const first = data.errors[0];
+        setError(`${data.message}. ${data.failed} rows skipped (row ${first.row}: ${first.error})`);
+      } else {
+        showToast(data.message || 'Questions imported successfully', 'success');
+        setShowImport(false);
+        setReplaceQuestions(false);
+      }
+    } catch {
+      setError('Network error. Please try again.');
+    }
+  };
+
   const handleFileUpload = (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0];
+    if (file && quiz && /\.(csv|ndjson|jsonl)$/i.test(file.name)) {
+      // Large question banks are streamed to the server instead of parsed in the browser
+      uploadQuestionFile(file);
+      e.target.value = '';
+      return;
+    }
     if (file) {
       const reader = new FileReader();
       reader.onload = (event) => {
@@ -367,12 +407,33 @@ export function CreateQuiz({ quiz: existingQuiz, onBack, onQuizCreated, onHost }
       });
 
       if (response.ok) {
-        const data = await response.json();
-        showToast(data.message || 'Questions generated successfully', 'success');
-        fetchQuiz(quiz.id);
-        setShowAIGenerate(false);
-        setAiPrompt('');
-        setReplaceQuestions(false);
+        // Generation runs as a background job; poll it until it finishes
+        let job = await response.json();
+        let shownCount = 0;
+        while (job.status === 'queued' || job.status === 'running') {
+          await new Promise((resolve) => setTimeout(resolve, 1500));
+          const jobResponse = await fetch(`${API_URL}/ai-jobs/${job.id}`, {
+            headers: { Authorization: `Bearer ${token}` },
+          });
+          if (!jobResponse.ok) break;
+          job = await jobResponse.json();
+          if (job.count > shownCount) {
+            shownCount = job.count;
+            fetchQuiz(quiz.id);
+          }
+        }
+
+        if (job.status === 'completed') {
+          const action = replaceQuestions ? 'Replaced with' : 'Generated and added';
+          showToast(`${action} ${job.count} questions`, 'success');
+          fetchQuiz(quiz.id);
+          setShowAIGenerate(false);
+          setAiPrompt('');
+          setReplaceQuestions(false);
+        } else {
+          setError(job.error || 'Failed to generate questions');
+          fetchQuiz(quiz.id);
+        }
       } else {
         const data = await response.json();
         setError(data.detail || 'Failed to generate questions');
@@ -609,11 +670,11 @@ export function CreateQuiz({ quiz: existingQuiz, onBack, onQuizCreated, onHost }
 
               <div>
                 <label className="block text-sm font-medium text-[#1E1E2E] dark:text-white mb-2">
-                  Upload JSON file
+                  Upload JSON, CSV or NDJSON file
                 </label>
                 <input
                   type="file"
-                  accept=".json"
+                  accept=".json,.csv,.ndjson,.jsonl"
                   onChange={handleFileUpload}
                   className="w-full px-4 py-3 bg-[#FFFBF7] dark:bg-[#0D0D0F] border border-[#1E1E2E]/10 dark:border-white/10 rounded-xl text-[#1E1E2E] dark:text-white"
                 />
@@ -15,6 +15,9 @@ import {
   ChevronUp
 } from 'lucide-react';
 
+// Members per page; matches the backend's MEMBER_PAGE_SIZE
+const MEMBER_PAGE_SIZE = 100;
+
 export function Groups() {
   const { user, token } = useAuth();
   const { showToast } = useToast();
@@ -26,6 +29,8 @@ export function Groups() {
   const [expandedGroup, setExpandedGroup] = useState<string | null>(null);
   const [inviteUsername, setInviteUsername] = useState('');
   const [inviting, setInviting] = useState<string | null>(null);
+  // Members beyond the first page, per group, loaded on demand
+  const [moreMembers, setMoreMembers] = useState<Record<string, Group['members']>>({});
 
   useEffect(() => {
     fetchGroups();
@@ -39,7 +44,10 @@ export function Groups() {
       const res = await fetch(`${API_URL}/groups`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      if (res.ok) setGroups(await res.json());
+      if (res.ok) {
+        setGroups(await res.json());
+        setMoreMembers({});
+      }
     } catch (err) {
       console.error('Failed to fetch groups:', err);
     } finally {
@@ -47,6 +55,20 @@ export function Groups() {
     }
   };
 
+  const fetchMoreMembers = async (groupId: string, offset: number) => {
+    try {
+      const res = await fetch(`${API_URL}/groups/${groupId}?offset=${offset}&limit=${MEMBER_PAGE_SIZE}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      if (res.ok) {
+        const page: Group = await res.json();
+        setMoreMembers((prev) => ({ ...prev, [groupId]: [...(prev[groupId] || []), ...page.members] }));
+      }
+    } catch {
+      showToast('Failed to load members', 'error');
+    }
+  };
+
   const handleCreateGroup = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!newGroupName.trim()) return;
@@ -175,6 +197,7 @@ export function Groups() {
             {groups.map((group) => {
               const isOwner = group.owner_id === user?.id;
               const isExpanded = expandedGroup === group.id;
+              const members = [...group.members, ...(moreMembers[group.id] || [])];
               return (
                 <div key={group.id} className="bg-white dark:bg-[#1A1A1F] rounded-2xl border border-[#1E1E2E]/5 dark:border-white/10 overflow-hidden">
                   <button
@@ -206,7 +229,7 @@ export function Groups() {
                       {/* Members */}
                       <div className="mt-4 space-y-2">
                         <h4 className="text-sm font-medium text-[#1E1E2E] dark:text-white mb-3">Members</h4>
-                        {group.members.map((member) => (
+                        {members.map((member) => (
                           <div key={member.id} className="flex items-center justify-between p-3 bg-[#FFFBF7] dark:bg-[#0D0D0F] rounded-xl">
                             <div className="flex items-center gap-3">
                               <div className="w-8 h-8 bg-gradient-to-br from-[#FF6B4A] to-[#FF8F6B] rounded-lg flex items-center justify-center">
@@ -227,6 +250,14 @@ export function Groups() {
                             )}
                           </div>
                         ))}
+                        {members.length < group.member_count && (
+                          <button
+                            onClick={() => fetchMoreMembers(group.id, members.length)}
+                            className="w-full py-2 text-sm text-violet-600 dark:text-violet-400 hover:bg-violet-50 dark:hover:bg-violet-500/10 rounded-xl transition-colors"
+                          >
+                            Load more ({members.length} of {group.member_count})
+                          </button>
+                        )}
                       </div>
 
                       {/* Invite (owner only) */}
@@ -418,6 +418,15 @@ export function QuizDetail({ quiz, token, onBack, onPlay }: QuizDetailProps) {
                                   {participant.tab_switches} tab switches
                                 </span>
                               )}
+                              {selectedSession.anomalies?.some((a) => a.user_id === participant.user_id && a.flags.length > 0) && (
+                                <span
+                                  className="flex items-center gap-1 text-red-600 dark:text-red-400"
+                                  title="Unusual answer timing or tab switching"
+                                >
+                                  <AlertTriangle className="w-3 h-3" />
+                                  Flagged
+                                </span>
+                              )}
                             </div>
                           </div>
                           <div className="text-right">
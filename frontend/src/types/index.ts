@@ -126,6 +126,17 @@ export interface QuestionStat {
   answer_distribution: Record<number, number>;
 }
 
+export interface AnomalyScore {
+  user_id: string;
+  score: number;
+  flags: string[];
+  fast_correct_answers: number;
+  timing_correlation: number;
+  correlated_with: string | null;
+  switched_before_answers: number;
+  switched_before_correct: number;
+}
+
 export interface QuizSession {
   id: string;
   quiz_id: string;
@@ -137,6 +148,7 @@ export interface QuizSession {
   total_questions: number;
   participants: PlayerResult[];
   question_stats: QuestionStat[];
+  anomalies?: AnomalyScore[];
 }
 
 export interface QuizAnalytics {